@@ -1,7 +1,17 @@
 import os
 import re
+import zlib
+import struct
+import hashlib
 import json
+import time
 import asyncio
+import math
+import heapq
+import bisect
+import functools
+import itertools
+from array import array
 from pathlib import Path
 from datetime import datetime
 from typing import Any, List, Optional, Tuple, Union
@@ -9,7 +19,7 @@ from typing import Any, List, Optional, Tuple, Union
 import discord
 from discord import Embed, Intents, Colour
 from discord.ext.tasks import loop
-from discord.ext.commands import Bot, Cog, DefaultHelpCommand, command
+from discord.ext.commands import Bot, Cog, DefaultHelpCommand, RoleConverter, BadArgument, command, group
 from dotenv import load_dotenv
 
 
@@ -22,8 +32,185 @@ EMOJIS_PATH = Path(__file__).parent / "emojis"
 ALTERS_PATH = Path(__file__).parent / "avatars"
 ALTERS = [("Tom Stanton", "tom.png"), ("Becky Hacker", "becky.png")]
 CONFIG_OPTIONS = ["bot", "important", "teatime", "mod-bot", "games"]
-CONFIG_PATH = Path(__file__).parent / "config.json"
+CONFIG_PATH = Path(os.getenv("CONFIG_PATH", Path(__file__).parent / "config.json"))
+ATTENDANCE_PATH = Path(__file__).parent / "attendance"
+ATTENDANCE_RECORD = struct.Struct("<Qdd")
+INDEX_PATH = Path(__file__).parent / "index"
+DIRECTORY_PATH = Path(__file__).parent / "directory.json"
+REGISTRATIONS_PATH = Path(__file__).parent / "registrations.json"
+MEMBER_PERMISSIONS = {
+    "read_messages": True,
+    "send_messages": True,
+    "create_instant_invite": True,
+    "embed_links": True,
+    "attach_files": True,
+    "add_reactions": True,
+    "use_external_emojis": True,
+    "mention_everyone": True,
+    "read_message_history": True,
+    "use_slash_commands": True,
+    "connect": True,
+    "speak": True,
+    "stream": True,
+    "use_voice_activation": True,
+}
+GUILD_TEMPLATE = {
+    "roles": [
+        {"name": "@everyone", "permissions": {"change_nickname": False}},
+        {
+            "name": "Admin",
+            "mentionable": True,
+            "colour": Colour.from_rgb(*ADTRAN_BLURPLE),
+            "permissions": {"administrator": True},
+            "config": "admin",
+        },
+        {"name": "4th Termer", "mentionable": True, "hoist": True, "colour": Colour.gold(), "permissions": MEMBER_PERMISSIONS},
+        {"name": "3rd Termer", "mentionable": True, "hoist": True, "colour": Colour.purple(), "permissions": MEMBER_PERMISSIONS},
+        {"name": "2nd Termer", "mentionable": True, "hoist": True, "colour": Colour.blue(), "permissions": MEMBER_PERMISSIONS},
+        {"name": "1st Termer", "mentionable": True, "hoist": True, "colour": Colour.green(), "permissions": MEMBER_PERMISSIONS},
+        {
+            "name": "Mod",
+            "mentionable": True,
+            "colour": Colour.from_rgb(*ADTRAN_BLURPLE),
+            "permissions": {"manage_messages": True},
+            "config": "mod",
+        },
+        {
+            "name": "REGISTER",
+            "permissions": {"read_messages": True, "read_message_history": True, "view_channel": False},
+            "config": "register",
+        },
+    ],
+    "categories": [
+        {"name": "Text Channels", "position": 0},
+        {"name": "info", "position": 1},
+        {"name": "Voice Channels", "position": 2},
+    ],
+    "channels": [
+        {"name": "tea-table", "category": "Text Channels", "position": 1, "config": "teatime"},
+        {"name": "games", "category": "Text Channels", "position": 2, "config": "games"},
+        {
+            "name": "third-term-mafia",
+            "category": "Text Channels",
+            "position": 3,
+            "overwrites": {"@everyone": {"read_messages": False}, "3rd Termer": {"read_messages": True}},
+        },
+        {
+            "name": "fourth-term-bar",
+            "category": "Text Channels",
+            "position": 4,
+            "overwrites": {"@everyone": {"read_messages": False}, "4th Termer": {"read_messages": True}},
+        },
+        {"name": "welcome", "category": "info", "position": 0, "overwrites": {"@everyone": {"send_messages": False}}},
+        {"name": "important", "category": "info", "position": 1, "config": "important"},
+        {"name": "bot-hell", "category": "info", "position": 2, "config": "bot"},
+        {
+            "name": "mod-commands",
+            "category": "info",
+            "position": 3,
+            "overwrites": {"@everyone": {"read_messages": False}, "Mod": {"read_messages": True}},
+            "config": "mod-bot",
+        },
+        {
+            "name": "register-now",
+            "category": "info",
+            "position": 4,
+            "overwrites": {"@everyone": {"read_messages": False}, "REGISTER": {"read_messages": True}},
+        },
+        {"name": "Tea Time", "voice": True, "category": "Voice Channels", "position": 1, "config": "teatime-voice"},
+        {"name": "Adtran Tears", "voice": True, "category": "Voice Channels", "position": 2},
+    ],
+}
+TEMPLATE_CONCURRENCY = 4
+EMOJI_CONCURRENCY = 4
 SCHEDULED = {"timecard": (651600, 1209600), "teatime": (75600, 86400, (0, 4))}
+END_OF_TERM_OFFSET = -10800
+JOB_INTERVAL = 30
+JOB_GRACE = 3600
+JOB_ATTEMPTS = 3
+JOB_RETENTION = 30 * DAYS_TO_SECONDS
+MENU_ICONS = [
+    "\N{DIGIT ONE}\N{COMBINING ENCLOSING KEYCAP}",
+    "\N{DIGIT TWO}\N{COMBINING ENCLOSING KEYCAP}",
+    "\N{DIGIT THREE}\N{COMBINING ENCLOSING KEYCAP}",
+    "\N{DIGIT FOUR}\N{COMBINING ENCLOSING KEYCAP}",
+    "\N{DIGIT FIVE}\N{COMBINING ENCLOSING KEYCAP}",
+    "\N{DIGIT SIX}\N{COMBINING ENCLOSING KEYCAP}",
+    "\N{DIGIT SEVEN}\N{COMBINING ENCLOSING KEYCAP}",
+    "\N{DIGIT EIGHT}\N{COMBINING ENCLOSING KEYCAP}",
+    "\N{DIGIT NINE}\N{COMBINING ENCLOSING KEYCAP}",
+    "🔟",
+    "🔴",
+    "🟠",
+    "🟡",
+    "🟢",
+    "🔵",
+    "🟣",
+    "🟤",
+    "⚫",
+    "⚪",
+]
+TERM_ROLES = ["1st Termer", "2nd Termer", "3rd Termer", "4th Termer"]
+RESERVED_ROLES = ["@everyone", "Admin", "Mod", "REGISTER", "Tom Stanton"] + TERM_ROLES
+REGISTER_TIMEOUT = 300
+REGISTER_TRIES = 3
+REGISTER_SAVE_INTERVAL = 10
+REGISTER_PROMPTS = {
+    "name": (
+        "Enter your name",
+        "Please provide your name in the form First Last (e.g. Will Humphlett)",
+        r"[a-zA-Z]+\s[a-zA-Z]+",
+    ),
+    "school_name": (
+        "Enter the name of your school",
+        "Please omit the 'University of' portion of your school name. (e.g. Auburn University becomes Auburn, UAH becomes Alabama Huntsville)",
+        r"[a-zA-Z\s]+",
+    ),
+    "school_colour": (
+        "Enter the color of your school",
+        "Please provide the rgb color code of your school's main color in the form (###,###,###) with no leading zeros",
+        r"\([0-9]{1,3},[0-9]{1,3},[0-9]{1,3}\)",
+    ),
+    "team": (
+        "Please enter the name of your team",
+        "Please omit the 'Team' portion of your name. (e.g. Team HISS becomes HISS)",
+        r"[a-zA-Z\s]+",
+    ),
+}
+GHOST_TTL = 600
+FLOOD_WINDOW = 10.0
+FLOOD_MESSAGES = 6
+FLOOD_STRIKES = 3
+FLOOD_MUTE = 300
+DUPLICATE_HISTORY = 4
+DUPLICATE_REPEATS = 2
+DUPLICATE_SHINGLE = 5
+DUPLICATE_SKETCH = 16
+DUPLICATE_SIMILARITY = 0.8
+DUPLICATE_WINDOW = 60.0
+HASH_BASE = 257
+HASH_MODULUS = (1 << 61) - 1
+ROLE_BATCH_DELAY = 1.0
+DIRECTORY_RESULTS = 15
+INVITE_MAX_AGE = 604800
+INVITE_MIN_LIFE = 3600
+INVITE_BATCH_DELAY = 2.0
+HELP_EMBED_LIMIT = 2048
+SEARCH_RESULTS = 10
+SEARCH_STOP_WORDS = {"the", "and", "a", "an", "to", "of", "in", "is", "it", "for", "on", "at", "i", "you"}
+REGISTER_MENUS = {"term": "Select your term number", "school": "Select your school"}
+COUNTDOWN_TICK = 5
+COUNTDOWN_CONCURRENCY = 5
+COUNTDOWN_CADENCE = [(DAYS_TO_SECONDS, 3600), (3600, 300), (600, 60), (0, 15)]
+COUNTDOWN_MESSAGES = {
+    "teatime": ("Next Teatime", "The next teatime is happening in", "No Teatime", "There are no more teatimes for you to join"),
+    "timecard": ("Next Timecard", "The next timecard is due in", "No Timecard", "There are no more timecards for you to turn in"),
+}
+JOB_MESSAGES = {
+    "teatime": ("Teatime", "Its teatime, join up in the teatime voice channel"),
+    "timecard": ("Timecard Notification", "Your timecards are due today"),
+    "end_of_term": ("Congratulations!!!", "Congrats on reaching the end of term!"),
+}
 
 with open(CONFIG_PATH) as config_file:
     config = json.load(config_file)
@@ -51,6 +238,43 @@ def update_config():
         json.dump(config, config_update, indent=4)
 
 
+class PermissionContext:
+    __slots__ = ("settings", "owner", "mod", "bot_channel", "mod_channel")
+
+    def __init__(self, settings: tuple, owner: bool, mod: bool, bot_channel: int, mod_channel: int):
+        self.settings = settings
+        self.owner = owner
+        self.mod = mod
+        self.bot_channel = bot_channel
+        self.mod_channel = mod_channel
+
+
+permission_contexts = {}
+
+
+async def permission_context(ctx) -> PermissionContext:
+    key = (ctx.guild.id, ctx.author.id)
+    context = permission_contexts.get(key)
+    guild_config = config["guilds"].get(str(ctx.guild.id), {})
+    settings = (guild_config.get("mod"), guild_config.get("bot"), guild_config.get("mod-bot"))
+    if context is None or context.settings != settings:
+        mod_role, bot_channel, mod_channel = settings
+        context = PermissionContext(
+            settings,
+            await ctx.bot.is_owner(ctx.author),
+            mod_role is not None and any(role.id == mod_role for role in ctx.author.roles),
+            bot_channel,
+            mod_channel,
+        )
+        permission_contexts[key] = context
+    return context
+
+
+def forget_permissions(guild_id: int, member_id: Optional[int] = None):
+    for key in [key for key in permission_contexts if key[0] == guild_id and member_id in (None, key[1])]:
+        permission_contexts.pop(key)
+
+
 async def send_msg(
     ctx,
     title: Optional[str] = Embed.Empty,
@@ -58,6 +282,7 @@ async def send_msg(
     footer: Optional[str] = Embed.Empty,
     channel: discord.TextChannel = None,
     wrap: bool = True,
+    alter: Optional[int] = None,
 ):
     if channel is None:
         channel = ctx.channel
@@ -67,14 +292,159 @@ async def send_msg(
         description = description.ljust(STR_LENGTH)
     if wrap:
         description = "```" + description + "```"
-    msg = await channel.send(
-        embed=Embed(title=title, description=description, colour=Colour.from_rgb(*ADTRAN_BLURPLE)).set_footer(
-            text=footer
-        )
+    embed = Embed(title=title, description=description, colour=Colour.from_rgb(*ADTRAN_BLURPLE)).set_footer(
+        text=footer
     )
+    guild = getattr(channel, "guild", None)
+    if guild is not None:
+        guild_config = config["guilds"].get(str(guild.id), {})
+        if alter is None:
+            alter = guild_config.get("alter")
+        if alter is not None:
+            msg = await personas.send(channel, alter, embed, username=persona_name(guild_config, alter))
+            if msg is not None:
+                return msg
+    msg = await channel.send(embed=embed)
     return msg
 
 
+def persona_name(guild_config: dict, alter: int) -> str:
+    name = ALTERS[alter][0]
+    if guild_config.get("nick"):
+        name = name.split()[0] + ' "' + guild_config["nick"] + '" ' + name.split()[1]
+    return name
+
+
+def persona_for(guild_config: dict, kind: str) -> Optional[int]:
+    return guild_config.get("personas", {}).get(kind, guild_config.get("alter"))
+
+
+SINGLE_FLIGHT_INVALIDATORS = {}
+
+
+def single_flight(ttl: float = 0, invalidate_on: Tuple[str, ...] = ()):
+    def decorator(func):
+        inflight, cache, generations = {}, {}, {}
+
+        @functools.wraps(func)
+        async def wrapper(guild, *args):
+            key = (guild.id, *args)
+            if key in cache and cache[key][0] > time.monotonic():
+                return cache[key][1]
+            if key not in inflight:
+                task = asyncio.ensure_future(func(guild, *args))
+                task.add_done_callback(functools.partial(finish, key, generations.get(guild.id, 0)))
+                inflight[key] = task
+            return await asyncio.shield(inflight[key])
+
+        def finish(key, generation: int, task: asyncio.Task):
+            inflight.pop(key, None)
+            if ttl and generations.get(key[0], 0) == generation and not task.cancelled() and not task.exception():
+                cache[key] = (time.monotonic() + ttl, task.result())
+
+        def cached(guild, *args) -> bool:
+            key = (guild.id, *args)
+            return key in inflight or (key in cache and cache[key][0] > time.monotonic())
+
+        def invalidate(guild_id: int):
+            generations[guild_id] = generations.get(guild_id, 0) + 1
+            for key in [key for key in cache if key[0] == guild_id]:
+                cache.pop(key)
+
+        wrapper.cached, wrapper.invalidate = cached, invalidate
+        for event in invalidate_on:
+            SINGLE_FLIGHT_INVALIDATORS.setdefault(event, []).append(invalidate)
+        return wrapper
+
+    return decorator
+
+
+def single_flight_invalidator(event: str):
+    async def listener(payload, *_):
+        guild_id = getattr(payload, "guild_id", None) or getattr(getattr(payload, "guild", None), "id", None)
+        if guild_id is not None:
+            for invalidate in SINGLE_FLIGHT_INVALIDATORS[event]:
+                invalidate(guild_id)
+
+    return listener
+
+
+@single_flight(
+    ttl=GHOST_TTL,
+    invalidate_on=("member_join", "member_remove", "guild_channel_create", "guild_channel_delete", "raw_message_delete"),
+)
+async def scan_ghost_ops(guild) -> List[Tuple[str, int]]:
+    text_channels = []
+    for channel in await guild.fetch_channels():
+        if type(channel) == discord.TextChannel:
+            text_channels.append(channel)
+    ghost_ops = {}
+    for channel in text_channels:
+        async for msg in channel.history():
+            if msg.author.bot:
+                continue
+            elif ghost_ops.get(msg.author.name) is None:
+                ghost_ops[msg.author.name] = 1
+            else:
+                ghost_ops[msg.author.name] += 1
+    return sorted([(k, v) for k, v in ghost_ops.items()], key=lambda x: x[1])
+
+
+def countdown_cadence(remaining: float) -> int:
+    for threshold, cadence in COUNTDOWN_CADENCE:
+        if remaining > threshold:
+            return cadence
+    return COUNTDOWN_CADENCE[-1][1]
+
+
+def countdown_embed(kind: str, target: Optional[datetime]) -> Embed:
+    title, prefix, done_title, done_description = COUNTDOWN_MESSAGES[kind]
+    if target is None:
+        title, description = done_title, done_description
+    else:
+        remaining = max(0, int((target - datetime.now()).total_seconds()))
+        days, hours, minutes, seconds = (
+            remaining // DAYS_TO_SECONDS,
+            remaining // 3600 % 24,
+            remaining // 60 % 60,
+            remaining % 60,
+        )
+        cadence = countdown_cadence(remaining)
+        if cadence >= 3600:
+            left = f"{days} days and {hours} hours"
+        elif cadence >= 60:
+            left = f"{hours} hours and {minutes} minutes"
+        else:
+            left = f"{minutes} minutes and {seconds} seconds"
+        description = f"{prefix} {left} ({target.strftime('%a %m/%d %I:%M %p')})."
+    return Embed(
+        title=title, description="```" + description.ljust(STR_LENGTH) + "```", colour=Colour.from_rgb(*ADTRAN_BLURPLE)
+    )
+
+
+def term_window(guild_config: dict) -> Tuple[float, float]:
+    return (
+        datetime.strptime(guild_config["time"]["start"], "%m/%d/%Y").timestamp(),
+        datetime.strptime(guild_config["time"]["end"], "%m/%d/%Y").timestamp(),
+    )
+
+
+def enqueue_job(kind: str, guild_id: str, due: float):
+    key = f"{kind}:{guild_id}:{int(due)}"
+    if key in config["jobs"]:
+        return False
+    config["jobs"][key] = {
+        "kind": kind,
+        "guild": guild_id,
+        "due": int(due),
+        "status": "pending",
+        "attempts": 0,
+        "finished": None,
+        "error": None,
+    }
+    return True
+
+
 async def next_scheduled(offset: float, repeat: float, day_range: Optional[Tuple[int, int]] = None):
     benchmark = float(MIDNIGHT_JAN1 + offset)
     while benchmark < datetime.now().timestamp() or (
@@ -112,27 +482,7 @@ async def find_member(ctx, name: str):
 
 async def reaction_menu(ctx, title: str, options: List[Tuple[str, Any]], icons: List[str] = None):
     if icons is None:
-        icons = [
-            "\N{DIGIT ONE}\N{COMBINING ENCLOSING KEYCAP}",
-            "\N{DIGIT TWO}\N{COMBINING ENCLOSING KEYCAP}",
-            "\N{DIGIT THREE}\N{COMBINING ENCLOSING KEYCAP}",
-            "\N{DIGIT FOUR}\N{COMBINING ENCLOSING KEYCAP}",
-            "\N{DIGIT FIVE}\N{COMBINING ENCLOSING KEYCAP}",
-            "\N{DIGIT SIX}\N{COMBINING ENCLOSING KEYCAP}",
-            "\N{DIGIT SEVEN}\N{COMBINING ENCLOSING KEYCAP}",
-            "\N{DIGIT EIGHT}\N{COMBINING ENCLOSING KEYCAP}",
-            "\N{DIGIT NINE}\N{COMBINING ENCLOSING KEYCAP}",
-            "🔟",
-            "🔴",
-            "🟠",
-            "🟡",
-            "🟢",
-            "🔵",
-            "🟣",
-            "🟤",
-            "⚫",
-            "⚪",
-        ]
+        icons = MENU_ICONS
     description = []
     for i, option in enumerate(options):
         description.append(f"{icons[i]} : {options[i][0]}")
@@ -205,6 +555,563 @@ async def text_menu(ctx, title: str, description: str, re_string: str):
         )
 
 
+class PersonaEngine:
+    def __init__(self):
+        self.webhooks = {}
+
+    async def webhook(self, channel: discord.TextChannel, alter: int) -> discord.Webhook:
+        if (channel.id, alter) not in self.webhooks:
+            for hook in await channel.webhooks():
+                if hook.user is not None and hook.user.id == channel.guild.me.id:
+                    for i, (name, _) in enumerate(ALTERS):
+                        if hook.name == name:
+                            self.webhooks[(channel.id, i)] = hook
+        if (channel.id, alter) not in self.webhooks:
+            with open(ALTERS_PATH / ALTERS[alter][1], "rb") as avatar:
+                avatar = avatar.read()
+            self.webhooks[(channel.id, alter)] = await channel.create_webhook(name=ALTERS[alter][0], avatar=avatar)
+        return self.webhooks[(channel.id, alter)]
+
+    def forget(self, channel_id: int):
+        for key in [key for key in self.webhooks if key[0] == channel_id]:
+            self.webhooks.pop(key)
+
+    async def send(self, channel: discord.TextChannel, alter: int, embed: Embed, username: str = None):
+        for _ in range(2):
+            try:
+                hook = await self.webhook(channel, alter)
+                return await hook.send(embed=embed, username=username, wait=True)
+            except discord.NotFound:
+                self.forget(channel.id)
+            except discord.Forbidden:
+                return None
+        return None
+
+
+personas = PersonaEngine()
+
+
+def normalize_name(name: str) -> str:
+    return " ".join(name.split()).casefold()
+
+
+class AttendanceLog:
+    def __init__(self, guild_id: int):
+        self.path = ATTENDANCE_PATH / f"{guild_id}.bin"
+        self.members, self.joins, self.leaves = array("Q"), array("d"), array("d")
+        self.open = {}
+        if self.path.exists():
+            with open(self.path, "rb") as log:
+                for member_id, joined, left in ATTENDANCE_RECORD.iter_unpack(log.read()):
+                    self.members.append(member_id)
+                    self.joins.append(joined)
+                    self.leaves.append(left)
+
+    def join(self, member_id: int, now: float):
+        self.open.setdefault(member_id, now)
+
+    def leave(self, member_id: int, now: float):
+        joined = self.open.pop(member_id, None)
+        if joined is None:
+            return
+        self.members.append(member_id)
+        self.joins.append(joined)
+        self.leaves.append(now)
+        ATTENDANCE_PATH.mkdir(exist_ok=True)
+        with open(self.path, "ab") as log:
+            log.write(ATTENDANCE_RECORD.pack(member_id, joined, now))
+
+    def stats(self, start: float, end: float) -> dict:
+        now = datetime.now().timestamp()
+        intervals = [
+            (member_id, max(joined, start), min(left, end))
+            for member_id, joined, left in itertools.chain(
+                zip(self.members, self.joins, self.leaves),
+                ((member_id, joined, now) for member_id, joined in self.open.items()),
+            )
+            if joined < end and left > start
+        ]
+        stats = {}
+        for member_id, joined, left in intervals:
+            member_stats = stats.setdefault(member_id, {"seconds": 0.0, "overlap": 0.0, "days": set()})
+            member_stats["seconds"] += left - joined
+            member_stats["days"].add(datetime.fromtimestamp(joined).date())
+        edges = sorted(
+            [(joined, 1, member_id) for member_id, joined, _ in intervals]
+            + [(left, -1, member_id) for member_id, _, left in intervals]
+        )
+        active, previous = {}, None
+        for moment, change, member_id in edges:
+            if previous is not None and len(active) > 1:
+                for active_id in active:
+                    stats[active_id]["overlap"] += moment - previous
+            previous = moment
+            active[member_id] = active.get(member_id, 0) + change
+            if active[member_id] == 0:
+                active.pop(member_id)
+        return stats
+
+
+attendance_logs = {}
+
+
+def attendance_log(guild_id: int) -> AttendanceLog:
+    if guild_id not in attendance_logs:
+        attendance_logs[guild_id] = AttendanceLog(guild_id)
+    return attendance_logs[guild_id]
+
+
+def teatime_voice(guild) -> Optional[discord.VoiceChannel]:
+    channel_id = config["guilds"].get(str(guild.id), {}).get("teatime-voice")
+    if channel_id is not None:
+        return guild.get_channel(channel_id)
+    return discord.utils.get(guild.voice_channels, name="Tea Time")
+
+
+def role_fields(spec: dict) -> dict:
+    fields = {"permissions": discord.Permissions(**spec.get("permissions", {}))}
+    if spec["name"] != "@everyone":
+        fields["name"] = spec["name"]
+        fields["colour"] = spec.get("colour", Colour.default())
+        fields["hoist"] = spec.get("hoist", False)
+        fields["mentionable"] = spec.get("mentionable", False)
+    return fields
+
+
+class TemplatePlan:
+    def __init__(self, guild):
+        self.guild = guild
+        self.roles = {}
+        self.channels = {}
+        self.operations = []
+
+    def add(self, action: str, kind: str, spec: dict, target=None, changes: List[str] = None):
+        self.operations.append((action, kind, spec, target, changes or []))
+
+    def describe(self) -> List[str]:
+        return [
+            f"{action} {kind} {spec['name']}" + (f" ({', '.join(changes)})" if changes else "")
+            for action, kind, spec, _, changes in self.operations
+        ]
+
+    def overwrites(self, spec: dict) -> dict:
+        return {
+            self.roles[name]: discord.PermissionOverwrite(**permissions)
+            for name, permissions in spec.get("overwrites", {}).items()
+            if name in self.roles
+        }
+
+
+async def plan_template(guild) -> TemplatePlan:
+    plan = TemplatePlan(guild)
+    guild_config = config["guilds"].get(str(guild.id), {})
+    roles = await guild.fetch_roles()
+    channels = await guild.fetch_channels()
+    managed = guild_config.get(
+        "template", {kind: [spec["name"] for spec in specs] for kind, specs in GUILD_TEMPLATE.items()}
+    )
+    for spec in GUILD_TEMPLATE["roles"]:
+        role = None
+        if spec.get("config") and guild_config.get(spec["config"]):
+            role = discord.utils.get(roles, id=guild_config[spec["config"]])
+        role = role or discord.utils.get(roles, name=spec["name"])
+        if role is None:
+            plan.add("create", "role", spec)
+            continue
+        plan.roles[spec["name"]] = role
+        changes = [field for field, value in role_fields(spec).items() if getattr(role, field) != value]
+        if changes:
+            plan.add("update", "role", spec, role, changes)
+    for spec in GUILD_TEMPLATE["categories"]:
+        category = discord.utils.get(channels, name=spec["name"], type=discord.ChannelType.category)
+        if category is None:
+            plan.add("create", "category", spec)
+            continue
+        plan.channels[spec["name"]] = category
+        if category.position != spec["position"]:
+            plan.add("update", "category", spec, category, ["position"])
+    for spec in GUILD_TEMPLATE["channels"]:
+        channel_type = discord.ChannelType.voice if spec.get("voice") else discord.ChannelType.text
+        channel = None
+        if spec.get("config") and guild_config.get(spec["config"]):
+            channel = discord.utils.get(channels, id=guild_config[spec["config"]])
+        channel = channel or discord.utils.get(channels, name=spec["name"], type=channel_type)
+        if channel is None:
+            plan.add("create", "channel", spec)
+            continue
+        plan.channels[spec["name"]] = channel
+        changes = []
+        if channel.name != spec["name"]:
+            changes.append("name")
+        if getattr(channel.category, "name", None) != spec["category"]:
+            changes.append("category")
+        if any(
+            name not in plan.roles or channel.overwrites.get(plan.roles[name]) != discord.PermissionOverwrite(**permissions)
+            for name, permissions in spec.get("overwrites", {}).items()
+        ):
+            changes.append("overwrites")
+        if changes:
+            plan.add("update", "channel", spec, channel, changes)
+    for kind, existing in (("roles", roles), ("categories", channels), ("channels", channels)):
+        current = [spec["name"] for spec in GUILD_TEMPLATE[kind]]
+        for name in managed.get(kind, []):
+            target = discord.utils.get(existing, name=name)
+            if name not in current and target is not None:
+                plan.add("delete", kind[:-1] if kind != "categories" else "category", {"name": name}, target)
+    return plan
+
+
+async def apply_template(plan: TemplatePlan) -> dict:
+    guild = plan.guild
+    guild_config = config["guilds"].setdefault(str(guild.id), {})
+    for action, kind, spec, target, changes in plan.operations:
+        if action == "delete":
+            await target.delete(reason="Removed from the guild template")
+            for key in [key for key, value in guild_config.items() if value == target.id]:
+                guild_config.pop(key)
+        elif kind == "role" and action == "create":
+            plan.roles[spec["name"]] = await guild.create_role(**role_fields(spec))
+        elif kind == "role":
+            fields = role_fields(spec)
+            await target.edit(**{field: fields[field] for field in changes})
+        elif kind == "category" and action == "create":
+            plan.channels[spec["name"]] = await guild.create_category(spec["name"], position=spec["position"])
+        elif kind == "category":
+            await target.edit(position=spec["position"])
+    for action, kind, spec, target, changes in plan.operations:
+        if kind != "channel" or action == "delete":
+            continue
+        category = plan.channels.get(spec["category"])
+        if action == "create":
+            create = guild.create_voice_channel if spec.get("voice") else guild.create_text_channel
+            plan.channels[spec["name"]] = await create(
+                spec["name"], category=category, position=spec["position"], overwrites=plan.overwrites(spec)
+            )
+        else:
+            fields = {"name": spec["name"], "category": category}
+            if "overwrites" in changes:
+                overwrites = dict(target.overwrites)
+                overwrites.update(plan.overwrites(spec))
+                fields["overwrites"] = overwrites
+            await target.edit(**{field: value for field, value in fields.items() if field in changes})
+    for spec in GUILD_TEMPLATE["roles"] + GUILD_TEMPLATE["channels"]:
+        target = plan.roles.get(spec["name"]) or plan.channels.get(spec["name"])
+        if spec.get("config") and target is not None:
+            guild_config[spec["config"]] = target.id
+    guild_config["template"] = {kind: [spec["name"] for spec in specs] for kind, specs in GUILD_TEMPLATE.items()}
+    update_config()
+    return plan.channels
+
+
+emoji_file_hashes = {}
+
+
+def local_emojis() -> dict:
+    emojis = {}
+    for path in sorted(EMOJIS_PATH.iterdir(), key=lambda path: path.stat().st_mtime):
+        stat = path.stat()
+        key = (path.name, stat.st_mtime_ns, stat.st_size)
+        if key not in emoji_file_hashes:
+            with open(path, "rb") as emoji_img:
+                emoji_file_hashes[key] = hashlib.sha256(emoji_img.read()).hexdigest()
+        emojis[path.stem] = (path, emoji_file_hashes[key])
+    return emojis
+
+
+async def sync_guild_emojis(guild, emojis: dict) -> List[str]:
+    synced = config["guilds"].setdefault(str(guild.id), {}).setdefault("emojis", {})
+    changes = []
+    for name, (path, digest) in emojis.items():
+        emoji = discord.utils.get(guild.emojis, name=name)
+        if emoji is not None and (name not in synced or synced[name][1] == digest):
+            synced[name] = [emoji.id, digest]
+            continue
+        with open(path, "rb") as emoji_img:
+            emoji_img = emoji_img.read()
+        if emoji is not None:
+            await emoji.delete(reason="Emoji asset changed")
+            changes.append(f"replaced {name}")
+        else:
+            changes.append(f"added {name}")
+        emoji = await guild.create_custom_emoji(name=name, image=emoji_img)
+        synced[name] = [emoji.id, digest]
+    return changes
+
+
+async def sync_emojis(guilds: list) -> List[Tuple[Any, List[str], Optional[Exception]]]:
+    emojis = local_emojis()
+    semaphore = asyncio.Semaphore(EMOJI_CONCURRENCY)
+
+    async def sync_guild(guild):
+        async with semaphore:
+            try:
+                return guild, await sync_guild_emojis(guild, emojis), None
+            except discord.HTTPException as e:
+                return guild, [], e
+
+    results = await asyncio.gather(*[sync_guild(guild) for guild in guilds])
+    update_config()
+    return results
+
+
+class RoleRegistry:
+    def __init__(self):
+        self.guilds = {}
+        self.locks = {}
+
+    def registry(self, guild) -> dict:
+        return self.guilds.setdefault(guild.id, {"teams": {}, "schools": {}})
+
+    def record(self, guild, kind: str, role: discord.Role):
+        self.registry(guild)[kind][normalize_name(role.name)] = role.id
+
+    def forget(self, guild, role: discord.Role):
+        for roles in self.registry(guild).values():
+            for name in [name for name, role_id in roles.items() if role_id == role.id]:
+                roles.pop(name)
+
+    def persist(self, guild):
+        guild_config = config["guilds"].setdefault(str(guild.id), {})
+        teams = sorted(self.registry(guild)["teams"].values())
+        if guild_config.get("teams") != teams:
+            guild_config["teams"] = teams
+            update_config()
+
+    def get(self, guild, kind: str, name: str) -> Optional[discord.Role]:
+        role_id = self.registry(guild)[kind].get(normalize_name(name))
+        return guild.get_role(role_id) if role_id is not None else None
+
+    def kind_of(self, guild, role: discord.Role) -> Optional[str]:
+        for kind, roles in self.registry(guild).items():
+            if role.id in roles.values():
+                return kind
+        return None
+
+    def adoptable(self, guild, role: discord.Role) -> bool:
+        name = normalize_name(role.name)
+        if role.managed or role.is_default() or name in [normalize_name(reserved) for reserved in RESERVED_ROLES]:
+            return False
+        if name in [normalize_name(school) for school in config["colleges"].keys()]:
+            return False
+        guild_config = config["guilds"].get(str(guild.id), {})
+        excluded = [guild_config.get(key) for key in ("admin", "mod", "register")]
+        for menu in guild_config.get("reaction_roles", {}).values():
+            excluded += menu["roles"].values()
+        return role.id not in excluded
+
+    async def get_or_create(self, guild, kind: str, name: str, **kwargs) -> discord.Role:
+        async with self.locks.setdefault(guild.id, asyncio.Lock()):
+            if guild.id not in self.guilds:
+                await self.reconcile(guild)
+            role = self.get(guild, kind, name)
+            if role is None and kind == "teams":
+                role = discord.utils.find(
+                    lambda role: normalize_name(role.name) == normalize_name(name) and self.adoptable(guild, role),
+                    guild.roles,
+                )
+            if role is None:
+                role = await guild.create_role(name=" ".join(name.split()), **kwargs)
+            if self.kind_of(guild, role) is None:
+                self.record(guild, kind, role)
+                if kind == "teams":
+                    self.persist(guild)
+            return role
+
+    async def collect(self, guild, roles: List[discord.Role]):
+        for role in roles:
+            if self.kind_of(guild, role) == "teams" and len(role.members) == 0:
+                self.forget(guild, role)
+                self.persist(guild)
+                await role.delete(reason="Team role has no members")
+
+    async def reconcile(self, guild):
+        self.guilds[guild.id] = {"teams": {}, "schools": {}}
+        teams = config["guilds"].get(str(guild.id), {}).get("teams", [])
+        schools = [normalize_name(name) for name in config["colleges"].keys()]
+        grouped, unknown = {}, {}
+        for role in guild.roles:
+            name = normalize_name(role.name)
+            if role.id in teams:
+                grouped.setdefault(("teams", name), []).append(role)
+            elif name in schools and not role.managed and not role.is_default():
+                grouped.setdefault(("schools", name), []).append(role)
+            elif self.adoptable(guild, role):
+                unknown.setdefault(name, []).append(role)
+        for name, roles in unknown.items():
+            if ("teams", name) in grouped or len(roles) > 1:
+                grouped.setdefault(("teams", name), []).extend(roles)
+        for (kind, name), roles in grouped.items():
+            keep, *duplicates = sorted(roles, key=lambda role: (-len(role.members), role.id))
+            for duplicate in duplicates:
+                for member in duplicate.members:
+                    if keep not in member.roles:
+                        await member.add_roles(keep, reason="Merging duplicate role")
+                await duplicate.delete(reason="Duplicate role")
+            if kind == "teams" and len(keep.members) == 0:
+                await keep.delete(reason="Team role has no members")
+                continue
+            self.record(guild, kind, keep)
+        self.persist(guild)
+
+
+role_registry = RoleRegistry()
+
+
+class MemberDirectory:
+    def __init__(self, path: Path):
+        self.path = path
+        self.entries = {}
+        self.blob, self.starts, self.ids = "", array("Q"), array("Q")
+        self.stale, self.dirty = True, False
+        if path.exists():
+            with open(path) as directory_file:
+                self.entries = {int(user_id): entry for user_id, entry in json.load(directory_file).items()}
+
+    def update(self, member):
+        if member.bot or str(member.guild.id) not in config["guilds"]:
+            return
+        term = school = team = None
+        for role in member.roles:
+            kind = role_registry.kind_of(member.guild, role)
+            if role.name in TERM_ROLES:
+                term = role.name
+            elif kind == "schools":
+                school = role.name
+            elif kind == "teams":
+                team = role.name
+        entry = list(self.entries.get(member.id, [[], None, None, None, None, None]))
+        if member.guild.id not in entry[0]:
+            entry[0] = sorted(entry[0] + [member.guild.id])
+        if member.guild.id == entry[0][-1]:
+            entry[1:] = [member.nick or member.name, term, school, team, member.name]
+        if self.entries.get(member.id) != entry:
+            self.entries[member.id] = entry
+            self.stale = self.dirty = True
+
+    def index(self):
+        lines, self.starts, self.ids = [], array("Q"), array("Q")
+        offset = 0
+        for user_id, (_, *fields) in self.entries.items():
+            line = "\t".join(normalize_name(field) for field in fields if field) + "\n"
+            self.starts.append(offset)
+            self.ids.append(user_id)
+            lines.append(line)
+            offset += len(line)
+        self.blob = "".join(lines)
+        self.stale = False
+
+    def search(self, query: str) -> List[int]:
+        if self.stale:
+            self.index()
+        query = normalize_name(query)
+        prefix, substring = [], []
+        found = self.blob.find(query)
+        while found != -1 and query:
+            line = bisect.bisect_right(self.starts, found) - 1
+            user_id = self.ids[line]
+            if found == self.starts[line] or self.blob[found - 1] in "\t ":
+                prefix.append(user_id)
+            else:
+                substring.append(user_id)
+            next_line = self.starts[line + 1] if line + 1 < len(self.starts) else len(self.blob)
+            found = self.blob.find(query, next_line)
+        return prefix + substring
+
+    def save(self):
+        with open(self.path, "w") as directory_file:
+            json.dump(self.entries, directory_file, separators=(",", ":"))
+        self.dirty = False
+
+
+directory = MemberDirectory(DIRECTORY_PATH)
+
+
+class RegistrationStore:
+    def __init__(self, path: Path):
+        self.path = path
+        self.sessions = {}
+        self.dirty = False
+        if path.exists():
+            with open(path) as registrations_file:
+                self.sessions = json.load(registrations_file)
+
+    def save(self):
+        with open(self.path, "w") as registrations_file:
+            json.dump(self.sessions, registrations_file, separators=(",", ":"))
+        self.dirty = False
+
+
+registrations = RegistrationStore(REGISTRATIONS_PATH)
+
+
+class InvitePool:
+    def __init__(self):
+        self.invites = {}
+        self.pending = {}
+
+    def track(self, invite: discord.Invite):
+        self.invites.setdefault(invite.guild.id, {})[invite.code] = invite
+
+    def forget(self, invite: discord.Invite):
+        self.invites.get(invite.guild.id, {}).pop(invite.code, None)
+
+    async def refresh(self, guild) -> dict:
+        previous = self.invites.get(guild.id)
+        self.invites[guild.id] = {invite.code: invite for invite in await guild.invites()}
+        return previous
+
+    def reusable(self, invite: discord.Invite, channel) -> bool:
+        if invite.channel is None or invite.channel.id != channel.id or invite.revoked:
+            return False
+        if invite.inviter is None or invite.inviter.id != channel.guild.me.id or invite.temporary:
+            return False
+        if invite.max_uses and invite.uses >= invite.max_uses:
+            return False
+        if invite.max_age and invite.created_at is not None:
+            remaining = (invite.created_at - datetime.utcnow()).total_seconds() + invite.max_age
+            return remaining > INVITE_MIN_LIFE
+        return True
+
+    async def get(self, channel) -> discord.Invite:
+        if channel.guild.id not in self.invites:
+            try:
+                await self.refresh(channel.guild)
+            except discord.Forbidden:
+                self.invites[channel.guild.id] = {}
+        for invite in self.invites[channel.guild.id].values():
+            if self.reusable(invite, channel):
+                return invite
+        invite = await channel.create_invite(max_age=INVITE_MAX_AGE)
+        self.track(invite)
+        return invite
+
+    async def attribute(self, member) -> Optional[List[Tuple[Any, Optional[str]]]]:
+        guild = member.guild
+        if guild.id in self.pending:
+            self.pending[guild.id].append(member)
+            return None
+        self.pending[guild.id] = [member]
+        await asyncio.sleep(INVITE_BATCH_DELAY)
+        members = self.pending.pop(guild.id)
+        previous = await self.refresh(guild)
+        if previous is None:
+            return [(joined, None) for joined in members]
+        used = []
+        for code, invite in previous.items():
+            current = self.invites[guild.id].get(code)
+            if current is not None:
+                used += [code] * max(0, current.uses - invite.uses)
+            elif invite.max_uses and invite.uses + 1 >= invite.max_uses:
+                used.append(code)
+        if len(used) == len(members) and len(set(used)) == 1:
+            return [(joined, used[0]) for joined in members]
+        ambiguous = "|".join(sorted(set(used))) or None
+        return [(joined, ambiguous) for joined in members]
+
+
+invite_pool = InvitePool()
+
+
 class Owner(Cog, description="The owner commands available to you"):
     def __init__(self, bot):
         self.bot = bot
@@ -220,6 +1127,71 @@ class Owner(Cog, description="The owner commands available to you"):
     async def guilds(self, ctx):
         await send_msg(ctx, title="Active Guilds", description=[guild.name for guild in ctx.bot.guilds])
 
+    @command(
+        checks=[dm_only],
+        brief="View scheduled notifications",
+        description="View the most recent scheduled notification jobs and their outcomes",
+    )
+    async def jobs(self, ctx):
+        recent = sorted(config["jobs"].values(), key=lambda job: job["due"], reverse=True)[:15]
+        description = []
+        for job in recent:
+            guild = ctx.bot.get_guild(int(job["guild"]))
+            due = datetime.fromtimestamp(job["due"]).strftime("%m/%d %H:%M")
+            description.append(
+                f"{due} {job['kind']} {guild.name if guild else job['guild']}: {job['status']}"
+                + (f" ({job['error']})" if job["error"] else "")
+            )
+        await send_msg(ctx, title="Scheduled Jobs", description=description or "There are no scheduled jobs")
+
+    @command(
+        checks=[dm_only],
+        brief="Reconcile guilds with the template",
+        description="Diff every managed guild against the guild template, use !reconcile apply to apply the plan",
+    )
+    async def reconcile(self, ctx, mode: str = "dry"):
+        apply = mode.lower() == "apply"
+        semaphore = asyncio.Semaphore(TEMPLATE_CONCURRENCY)
+
+        async def reconcile_guild(guild):
+            async with semaphore:
+                try:
+                    plan = await plan_template(guild)
+                    if apply:
+                        await apply_template(plan)
+                except discord.HTTPException as e:
+                    return guild, None, e
+                return guild, plan, None
+
+        results = await asyncio.gather(
+            *[reconcile_guild(guild) for guild in ctx.bot.guilds if str(guild.id) in config["guilds"]]
+        )
+        if apply:
+            update_config()
+        for guild, plan, error in results:
+            if error is not None:
+                await send_msg(ctx, title=f"Reconcile Error in {guild.name}", description=str(error))
+                continue
+            lines = plan.describe() or ["No changes needed"]
+            if len(lines) > 20:
+                lines = lines[:20] + [f"...and {len(lines) - 20} more"]
+            await send_msg(ctx, title=f"{'Applied' if apply else 'Planned'} Changes for {guild.name}", description=lines)
+
+    @command(
+        checks=[dm_only],
+        brief="Sync emojis to every guild",
+        description="Upload new or changed emojis to every managed guild",
+    )
+    async def syncemojis(self, ctx):
+        results = await sync_emojis([guild for guild in ctx.bot.guilds if str(guild.id) in config["guilds"]])
+        description = []
+        for guild, changes, error in results:
+            if error is not None:
+                description.append(f"{guild.name}: failed ({error})")
+            elif changes:
+                description.append(f"{guild.name}: {', '.join(changes)}")
+        await send_msg(ctx, title="Emojis Synced", description=description or "Every guild is already up to date")
+
     @command(
         checks=[dm_only],
         brief="Generate an invite",
@@ -230,7 +1202,7 @@ class Owner(Cog, description="The owner commands available to you"):
             ctx, title="Select A Guild To Join", options=[(guild.name, guild) for guild in ctx.bot.guilds]
         )
         if inv_guild:
-            await ctx.channel.send(await inv_guild.system_channel.create_invite())
+            await ctx.channel.send(await invite_pool.get(inv_guild.system_channel))
 
     @command(
         checks=[dm_only],
@@ -273,16 +1245,130 @@ class Owner(Cog, description="The owner commands available to you"):
 class Admin(Cog, description="The admin commands available to you"):
     def __init__(self, bot):
         self.bot = bot
+        self.save_directory.start()
 
-    def cog_check(self, ctx):
-        return bool(ctx.guild) and (
-            ctx.bot.is_owner(ctx.author)
-            or ctx.guild.get_role(config["guilds"][str(ctx.guild.id)]["mod"]) in ctx.author.roles
-        )
+    async def cog_check(self, ctx):
+        if not ctx.guild:
+            return False
+        context = await permission_context(ctx)
+        return context.owner or context.mod
 
     @Cog.listener()
     async def on_ready(self):
         print(f"Logged in as {self.bot.user}")
+        await asyncio.gather(
+            *[
+                role_registry.reconcile(guild)
+                for guild in self.bot.guilds
+                if str(guild.id) in config["guilds"] and guild.id not in role_registry.guilds
+            ]
+        )
+        for guild in self.bot.guilds:
+            for member in guild.members:
+                directory.update(member)
+
+    @Cog.listener("on_ready")
+    async def refresh_invites(self):
+        for guild in self.bot.guilds:
+            if str(guild.id) in config["guilds"] and guild.id not in invite_pool.invites:
+                try:
+                    await invite_pool.refresh(guild)
+                except discord.Forbidden:
+                    continue
+
+    @Cog.listener()
+    async def on_invite_create(self, invite):
+        invite_pool.track(invite)
+
+    @Cog.listener()
+    async def on_invite_delete(self, invite):
+        if invite.guild is not None and invite.code in invite_pool.invites.get(invite.guild.id, {}):
+            invite_pool.invites[invite.guild.id][invite.code].revoked = True
+
+    @Cog.listener("on_member_join")
+    async def attribute_join(self, member):
+        if str(member.guild.id) not in config["guilds"]:
+            return
+        try:
+            attributions = await invite_pool.attribute(member)
+        except discord.Forbidden:
+            return
+        if attributions is None:
+            return
+        joins = config["guilds"][str(member.guild.id)].setdefault("joins", {})
+        description = []
+        for joined, code in attributions:
+            joins[str(joined.id)] = code
+            description.append(f"{joined.name} joined with {code or 'an unknown invite'}")
+        update_config()
+        channel = self.bot.get_channel(config["guilds"][str(member.guild.id)].get("mod-bot"))
+        if channel is not None:
+            await send_msg(None, title="Member Joins", description=description, channel=channel)
+
+    @loop(minutes=1)
+    async def save_directory(self):
+        if directory.dirty:
+            directory.save()
+
+    @save_directory.before_loop
+    async def before_save_directory(self):
+        await self.bot.wait_until_ready()
+
+    @Cog.listener("on_member_join")
+    async def add_to_directory(self, member):
+        directory.update(member)
+
+    @command(
+        checks=[mod_only],
+        brief="Look up a member across terms",
+        description="Look up a member in every term server by name, school, or team",
+    )
+    async def whois(self, ctx, *query):
+        results = directory.search(" ".join(query))
+        if not results:
+            await send_msg(ctx, title="Directory Search", description=f"No members found matching {' '.join(query)}")
+            return
+        description = []
+        for user_id in results[:DIRECTORY_RESULTS]:
+            guild_ids, nickname, term, school, team, _ = directory.entries[user_id]
+            terms = ", ".join(
+                guild.name.replace(" Co-op Term", "")
+                for guild in (ctx.bot.get_guild(guild_id) for guild_id in guild_ids)
+                if guild is not None
+            )
+            description.append(f"{nickname} | {term or '?'} | {school or '?'} | {team or '?'} | {terms}")
+        if len(results) > DIRECTORY_RESULTS:
+            description.append(f"...and {len(results) - DIRECTORY_RESULTS} more")
+        await send_msg(ctx, title="Directory Search", description=description)
+
+    @Cog.listener()
+    async def on_member_update(self, before, after):
+        directory.update(after)
+        if before.roles != after.roles:
+            forget_permissions(after.guild.id, after.id)
+            await role_registry.collect(after.guild, [role for role in before.roles if role not in after.roles])
+
+    @Cog.listener()
+    async def on_member_remove(self, member):
+        forget_permissions(member.guild.id, member.id)
+        await role_registry.collect(member.guild, member.roles)
+
+    @Cog.listener()
+    async def on_guild_role_update(self, before, after):
+        forget_permissions(after.guild.id)
+        kind = role_registry.kind_of(after.guild, after)
+        if kind is not None and before.name != after.name:
+            role_registry.forget(after.guild, after)
+            role_registry.record(after.guild, kind, after)
+
+    @Cog.listener()
+    async def on_guild_role_delete(self, role):
+        forget_permissions(role.guild.id)
+        kind = role_registry.kind_of(role.guild, role)
+        if kind is not None:
+            role_registry.forget(role.guild, role)
+            if kind == "teams":
+                role_registry.persist(role.guild)
 
     @Cog.listener()
     async def on_member_join(self, member):
@@ -356,9 +1442,12 @@ class Admin(Cog, description="The admin commands available to you"):
     @command(
         checks=[bot_only],
         brief="Change the alter",
-        description="Change the alter to another name/avatar",
+        description=f"Change the alter to another name/avatar, optionally only for one of {list(JOB_MESSAGES)}",
     )
-    async def alter(self, ctx):
+    async def alter(self, ctx, kind: str = None):
+        if kind is not None and kind not in JOB_MESSAGES:
+            await send_msg(ctx, title="Alter Error", description=f"The announcement must be in {list(JOB_MESSAGES)}")
+            return
         alter = await reaction_menu(
             ctx,
             title="Select a new alter",
@@ -366,7 +1455,9 @@ class Admin(Cog, description="The admin commands available to you"):
         )
         if alter is None:
             return
-        if ALTERS[alter][0].split(" ")[0] == ctx.bot.user.name.split(" ")[0]:
+        guild_config = config["guilds"][str(ctx.guild.id)]
+        current = guild_config.get("alter") if kind is None else persona_for(guild_config, kind)
+        if alter == current:
             await send_msg(
                 ctx,
                 title="Alter Error",
@@ -374,22 +1465,35 @@ class Admin(Cog, description="The admin commands available to you"):
             )
             return
         else:
-            with open(ALTERS_PATH / ALTERS[alter][1], "rb") as avatar:
-                avatar = avatar.read()
-            await ctx.bot.user.edit(username=ALTERS[alter][0], avatar=avatar)
+            if kind is None:
+                guild_config["alter"] = alter
+            else:
+                guild_config.setdefault("personas", {})[kind] = alter
+            update_config()
             await send_msg(
                 ctx,
                 title="Alter Updated",
-                description=f"The bot alter has been updated to {ALTERS[alter][0]}"
+                description=f"The {kind or 'bot'} alter has been updated to {ALTERS[alter][0]}",
+                alter=alter,
             )
 
+    @Cog.listener()
+    async def on_webhooks_update(self, channel):
+        personas.forget(channel.id)
+
     @command(
         checks=[bot_only],
         brief="Add a new emoji",
         description="Add a new emoji by commenting an uploaded image with !emoji <name>",
     )
     async def emoji(self, ctx, emoji_name):
-        if len(ctx.message.attachments) == 0:
+        if not re.fullmatch(r"[A-Za-z0-9_]{2,32}", emoji_name):
+            await send_msg(
+                ctx,
+                title="Emoji Error",
+                description="Emoji names must be 2 to 32 letters, numbers, or underscores",
+            )
+        elif len(ctx.message.attachments) == 0:
             await send_msg(
                 ctx, title="Emoji Error", description="!emoji <name> must be used when commenting on an uploaded emoji"
             )
@@ -397,9 +1501,32 @@ class Admin(Cog, description="The admin commands available to you"):
             emoji_file = ctx.message.attachments[0]
             emoji_file = await emoji_file.to_file()
             emoji_file = emoji_file.fp.read()
-            await ctx.guild.create_custom_emoji(name=emoji_name, image=emoji_file)
+            old_emoji = discord.utils.get(ctx.guild.emojis, name=emoji_name)
+            try:
+                new_emoji = await ctx.guild.create_custom_emoji(name=emoji_name, image=emoji_file)
+            except discord.HTTPException as e:
+                await send_msg(ctx, title="Emoji Error", description=f"Discord rejected the emoji ({e.text})")
+                return
+            if old_emoji is not None:
+                await old_emoji.delete(reason="Emoji asset changed")
+            for old_emoji_file in EMOJIS_PATH.glob(f"{emoji_name}.*"):
+                old_emoji_file.unlink()
             with open(EMOJIS_PATH / f"{emoji_name}.jpg", "wb") as new_emoji_file:
                 new_emoji_file.write(emoji_file)
+            config["guilds"].setdefault(str(ctx.guild.id), {}).setdefault("emojis", {})[emoji_name] = [
+                new_emoji.id,
+                hashlib.sha256(emoji_file).hexdigest(),
+            ]
+            results = await sync_emojis(
+                [guild for guild in ctx.bot.guilds if str(guild.id) in config["guilds"] or guild == ctx.guild]
+            )
+            failed = [guild.name for guild, _, error in results if error is not None]
+            await send_msg(
+                ctx,
+                title="Emoji Added",
+                description=f"{emoji_name} has been synced to {len(results) - len(failed)} servers"
+                + (f", failed in {', '.join(failed)}" if failed else ""),
+            )
         else:
             await send_msg(ctx, title="Emoji Error", description="Multiple emoji files cannot be uploaded at once")
 
@@ -409,12 +1536,12 @@ class Admin(Cog, description="The admin commands available to you"):
         description='Change the bot nickname to match the form First "Nick" Last',
     )
     async def botnick(self, ctx, nickname=None):
-        if '"' in ctx.bot.user.name:
-            basename = ctx.bot.user.name.split('"')[0][:-1] + " " + ctx.bot.user.name.split('"')[-1][1:]
-        else:
-            basename = ctx.bot.user.name
+        guild_config = config["guilds"][str(ctx.guild.id)]
+        basename = ALTERS[guild_config.get("alter", 0)][0]
         if nickname is None:
-            await ctx.bot.user.edit(username=basename)
+            guild_config.pop("nick", None)
+            update_config()
+            await ctx.guild.me.edit(nick=None)
             await send_msg(ctx, title="Nickname Reset", description=f"The bot nickname has been reset")
         elif '"' in nickname:
             await send_msg(ctx, title="Nickname Error", description="The bot nickname cannot contain '\"'")
@@ -424,8 +1551,10 @@ class Admin(Cog, description="The admin commands available to you"):
                     ctx, title="Nickname Error", description="The bot nickname cannot be longer than 32 characters"
                 )
             else:
-                nickname = basename.split()[0] + ' "' + nickname + '" ' + basename.split()[1]
-                await ctx.bot.user.edit(username=nickname)
+                guild_config["nick"] = nickname
+                update_config()
+                nickname = persona_name(guild_config, guild_config.get("alter", 0))
+                await ctx.guild.me.edit(nick=nickname)
                 await send_msg(ctx, title="Nickname Changed", description=f"The bot is now {nickname}")
 
     @command(
@@ -513,170 +1642,23 @@ class Admin(Cog, description="The admin commands available to you"):
         if config["guilds"].get(str(new_guild.id)) is None:
             config["guilds"][str(new_guild.id)] = {}
         # Emojis
-        for emoji in EMOJIS_PATH.iterdir():
-            with open(emoji, "rb") as emoji_img:
-                emoji_img = emoji_img.read()
-            await new_guild.create_custom_emoji(name=emoji.stem, image=emoji_img)
-        # Roles
-        await new_guild.default_role.edit(
-            permissions=discord.Permissions(change_nickname=False),
-        )
-        admin_role = await new_guild.create_role(
-            name="Admin",
-            mentionable=True,
-            colour=Colour.from_rgb(*ADTRAN_BLURPLE),
-            permissions=discord.Permissions(administrator=True),
-        )
-        fourth_role = await new_guild.create_role(
-            name="4th Termer",
-            mentionable=True,
-            hoist=True,
-            colour=Colour.gold(),
-            permissions=discord.Permissions(
-                read_messages=True,
-                send_messages=True,
-                create_instant_invite=True,
-                embed_links=True,
-                attach_files=True,
-                add_reactions=True,
-                use_external_emojis=True,
-                mention_everyone=True,
-                read_message_history=True,
-                use_slash_commands=True,
-                connect=True,
-                speak=True,
-                stream=True,
-                use_voice_activation=True,
-            ),
-        )
-        third_role = await new_guild.create_role(
-            name="3rd Termer",
-            mentionable=True,
-            hoist=True,
-            colour=Colour.purple(),
-            permissions=discord.Permissions(
-                read_messages=True,
-                send_messages=True,
-                create_instant_invite=True,
-                embed_links=True,
-                attach_files=True,
-                add_reactions=True,
-                use_external_emojis=True,
-                mention_everyone=True,
-                read_message_history=True,
-                use_slash_commands=True,
-                connect=True,
-                speak=True,
-                stream=True,
-                use_voice_activation=True,
-            ),
-        )
-        await new_guild.create_role(
-            name="2nd Termer",
-            mentionable=True,
-            hoist=True,
-            colour=Colour.blue(),
-            permissions=discord.Permissions(
-                read_messages=True,
-                send_messages=True,
-                create_instant_invite=True,
-                embed_links=True,
-                attach_files=True,
-                add_reactions=True,
-                use_external_emojis=True,
-                mention_everyone=True,
-                read_message_history=True,
-                use_slash_commands=True,
-                connect=True,
-                speak=True,
-                stream=True,
-                use_voice_activation=True,
-            ),
-        )
-        await new_guild.create_role(
-            name="1st Termer",
-            mentionable=True,
-            hoist=True,
-            colour=Colour.green(),
-            permissions=discord.Permissions(
-                read_messages=True,
-                send_messages=True,
-                create_instant_invite=True,
-                embed_links=True,
-                attach_files=True,
-                add_reactions=True,
-                use_external_emojis=True,
-                mention_everyone=True,
-                read_message_history=True,
-                use_slash_commands=True,
-                connect=True,
-                speak=True,
-                stream=True,
-                use_voice_activation=True,
-            ),
-        )
-        mod_role = await new_guild.create_role(
-            name="Mod",
-            mentionable=True,
-            colour=Colour.from_rgb(*ADTRAN_BLURPLE),
-            permissions=discord.Permissions(manage_messages=True),
-        )
-        register_role = await new_guild.create_role(
-            name="REGISTER",
-            permissions=discord.Permissions(read_messages=True, read_message_history=True, view_channel=False),
-        )
+        try:
+            await sync_guild_emojis(new_guild, local_emojis())
+        except discord.HTTPException as e:
+            await send_msg(ctx, title="Emoji Error", description=f"Emojis could not be synced to {new_guild.name} ({e})")
+        # Roles and Channels
+        channels = await apply_template(await plan_template(new_guild))
         for college, colors in config["colleges"].items():
-            await new_guild.create_role(name=college, mentionable=True, colour=Colour.from_rgb(*colors))
-        # Channels
-        categories = await new_guild.fetch_channels()
-        teatime_channel = await new_guild.create_text_channel("tea-table", position=1, category=categories[0])
-        games_channel = await new_guild.create_text_channel("games", position=2, category=categories[0])
-        overwrites = {
-            new_guild.default_role: discord.PermissionOverwrite(read_messages=False),
-            third_role: discord.PermissionOverwrite(read_messages=True),
-        }
-        await new_guild.create_text_channel(
-            "third-term-mafia", overwrites=overwrites, position=3, category=categories[0]
-        )
-        overwrites = {
-            new_guild.default_role: discord.PermissionOverwrite(read_messages=False),
-            fourth_role: discord.PermissionOverwrite(read_messages=True),
-        }
-        await new_guild.create_text_channel(
-            "fourth-term-bar", overwrites=overwrites, position=4, category=categories[0]
-        )
-        info_category = await new_guild.create_category("info", position=0)
-        overwrites = {new_guild.default_role: discord.PermissionOverwrite(send_messages=False)}
-        welcome_channel = await info_category.create_text_channel("welcome", overwrites=overwrites, position=0)
-        important_channel = await info_category.create_text_channel("important", position=1)
-        bot_channel = await info_category.create_text_channel("bot-hell", position=2)
-        overwrites = {
-            new_guild.default_role: discord.PermissionOverwrite(read_messages=False),
-            mod_role: discord.PermissionOverwrite(read_messages=True),
-        }
-        mod_bot_channel = await info_category.create_text_channel("mod-commands", overwrites=overwrites, position=3)
-        overwrites = {
-            new_guild.default_role: discord.PermissionOverwrite(read_messages=False),
-            register_role: discord.PermissionOverwrite(read_messages=True),
-        }
-        register_channel = await info_category.create_text_channel("register-now", overwrites=overwrites, position=4)
-        await new_guild.create_voice_channel("Tea Time", position=1, category=categories[1])
-        await new_guild.create_voice_channel("Adtran Tears", position=2, category=categories[1])
-        await categories[0].edit(position=0)
-        await info_category.edit(position=1)
-        await categories[1].edit(position=2)
+            role_registry.record(
+                new_guild,
+                "schools",
+                await new_guild.create_role(name=college, mentionable=True, colour=Colour.from_rgb(*colors)),
+            )
+        welcome_channel, register_channel = channels["welcome"], channels["register-now"]
         # Configuration Update
         config["guilds"][str(new_guild.id)]["time"] = {}
         config["guilds"][str(new_guild.id)]["time"]["start"] = start_date
         config["guilds"][str(new_guild.id)]["time"]["end"] = end_date
-        config["guilds"][str(new_guild.id)]["admin"] = admin_role.id
-        config["guilds"][str(new_guild.id)]["mod"] = mod_role.id
-        config["guilds"][str(new_guild.id)]["bot"] = bot_channel.id
-        config["guilds"][str(new_guild.id)]["important"] = important_channel.id
-        config["guilds"][str(new_guild.id)]["teatime"] = teatime_channel.id
-        config["guilds"][str(new_guild.id)]["games"] = games_channel.id
-        config["guilds"][str(new_guild.id)]["mod-bot"] = mod_bot_channel.id
-        config["guilds"][str(new_guild.id)]["register"] = register_role.id
         update_config()
         await new_guild.edit(system_channel=welcome_channel)
         # Send Notifications
@@ -686,15 +1668,24 @@ class Admin(Cog, description="The admin commands available to you"):
             description="You have been DM'd by the bot, please read the instructions and register in response to the DM",
             channel=register_channel,
         )
-        await ctx.channel.send(await welcome_channel.create_invite())
+        await ctx.channel.send(await invite_pool.get(welcome_channel))
 
 
 class User(Cog, description="The base commands available to you"):
     def __init__(self, bot):
         self.bot = bot
-        self.notify_teatime.start()
-        self.notify_timecard.start()
-        self.notify_end_of_term.start()
+        config.setdefault("jobs", {})
+        for job in config["jobs"].values():
+            if job["status"] == "sending":
+                job["status"], job["error"] = "interrupted", "bot stopped while sending"
+        self.run_jobs.start()
+        for session in registrations.sessions.values():
+            session["expires"] = int(datetime.now().timestamp()) + REGISTER_TIMEOUT
+        registrations.dirty = bool(registrations.sessions)
+        self.expire_registrations.start()
+        self.save_registrations.start()
+        self.countdown_edits = {}
+        self.tick_countdowns.start()
 
     @command(
         checks=[dm_only],
@@ -702,99 +1693,207 @@ class User(Cog, description="The base commands available to you"):
         description="Register in the server with your term number, school, and team",
     )
     async def register(self, ctx):
-        if config["members"].get(str(ctx.message.author.id)):
-            coop_guild = await ctx.bot.fetch_guild(config["members"][str(ctx.message.author.id)])
-            nickname = await text_menu(
-                ctx,
-                title="Enter your name",
-                description="Please provide your name in the form First Last (e.g. Will Humphlett)",
-                re_string=r"[a-zA-Z]+\s[a-zA-Z]+"
-            )
-            if nickname is None:
-                return
-            nickname = " ".join([word.capitalize() for word in nickname.split()])
-            roles = []
-            term_number = await reaction_menu(
-                ctx,
-                title="Select your term number",
-                options=[
-                    ("1st Term", [role for role in await coop_guild.fetch_roles() if role.name == "1st Termer"]),
-                    ("2nd Term", [role for role in await coop_guild.fetch_roles() if role.name == "2nd Termer"]),
-                    ("3rd Term", [role for role in await coop_guild.fetch_roles() if role.name == "3rd Termer"]),
-                    ("4th Term", [role for role in await coop_guild.fetch_roles() if role.name == "4th Termer"]),
-                ],
-            )
-            if term_number is None:
-                return
-            roles.append(term_number[0])
-            school = await reaction_menu(
+        session = registrations.sessions.get(str(ctx.message.author.id))
+        if session is not None:
+            prompt, session["prompt"] = session.get("prompt"), None
+            await self.delete_prompt(ctx.message.author, prompt)
+            await self.prompt_registration(ctx.message.author, session)
+        elif config["members"].get(str(ctx.message.author.id)):
+            session = {"step": "name", "guild": config["members"][str(ctx.message.author.id)], "tries": 0, "data": {}}
+            registrations.sessions[str(ctx.message.author.id)] = session
+            await self.prompt_registration(ctx.message.author, session)
+        else:
+            await send_msg(
                 ctx,
-                title="Select your school",
-                options=[(school, school) for school in config["colleges"].keys()] + [("Other", "Other")],
+                title="Register Error",
+                description="You are not elegible to register for a server at this time. If you feel this is an error, please contact your server mod.",
             )
-            if school is None:
-                return
-            elif school == "Other":
-                existing_schools = [role.name for role in await coop_guild.fetch_roles()]
-                new_school = await text_menu(
-                    ctx,
-                    title="Enter the name of your school",
-                    description="Please omit the 'University of' portion of your school name. (e.g. Auburn University becomes Auburn, UAH becomes Alabama Huntsville)",
-                    re_string=r"[a-zA-Z\s]+",
-                )
-                if new_school is None:
-                    return
-                new_school = new_school.capitalize()
-                if new_school == "Other" or new_school in existing_schools:
-                    await send_msg(
-                        ctx,
-                        title="Haha, very funny",
-                        description="Restart your registration punk ass edge testing bitch",
-                    )
-                    return
-                school_colors = await text_menu(
-                    ctx,
-                    title="Enter the color of your school",
-                    description="Please provide the rgb color code of your school's main color in the form (###,###,###) with no leading zeros",
-                    re_string=r"\([0-9]{1,3},[0-9]{1,3},[0-9]{1,3}\)"
-                )
-                if school_colors is None:
-                    return
-                school_colors = school_colors.strip().replace("(", "").replace(")", "").split(",")
-                school_colors = tuple(int(color) for color in school_colors)
-                config["colleges"][new_school] = list(school_colors)
-                update_config()
-                school = await coop_guild.create_role(name=new_school, colour=Colour.from_rgb(*school_colors), mentionable=True)
+
+    async def prompt_registration(self, user, session: dict):
+        channel = user.dm_channel or await user.create_dm()
+        step = session["step"]
+        if step in REGISTER_MENUS:
+            if step == "term":
+                options = [role[:-2] for role in TERM_ROLES]
             else:
-                school = [school_role for school_role in await coop_guild.fetch_roles() if school_role.name == school][0]
-            roles.append(school)
-            team_name = await text_menu(
-                ctx,
-                title="Please enter the name of your team",
-                description="Please omit the 'Team' portion of your name. (e.g. Team HISS becomes HISS)",
-                re_string=r"[a-zA-Z\s]+",
+                options = list(config["colleges"].keys()) + ["Other"]
+            msg = await send_msg(
+                None,
+                title=REGISTER_MENUS[step],
+                description="\n".join(f"{MENU_ICONS[i]} : {option}" for i, option in enumerate(options)),
+                channel=channel,
+                wrap=False,
             )
-            if team_name is None:
+            for icon in MENU_ICONS[: len(options)]:
+                await msg.add_reaction(icon)
+            session["options"] = options
+        else:
+            title, description, _ = REGISTER_PROMPTS[step]
+            msg = await send_msg(None, title=title, description=description, channel=channel)
+            session.pop("options", None)
+        session["prompt"] = msg.id
+        session["expires"] = int(datetime.now().timestamp()) + REGISTER_TIMEOUT
+        registrations.dirty = True
+
+    def claim_prompt(self, user, session: dict, prompt: Optional[int]) -> bool:
+        if prompt is None or registrations.sessions.get(str(user.id)) is not session or session.get("prompt") != prompt:
+            return False
+        session["prompt"] = None
+        return True
+
+    async def delete_prompt(self, user, prompt: Optional[int]):
+        if prompt is None:
+            return
+        channel = user.dm_channel or await user.create_dm()
+        try:
+            await channel.get_partial_message(prompt).delete()
+        except discord.HTTPException:
+            pass
+
+    async def end_registration(self, user, title: str, description: str):
+        registrations.sessions.pop(str(user.id), None)
+        registrations.dirty = True
+        await send_msg(None, title=title, description=description, channel=user.dm_channel or await user.create_dm())
+
+    async def advance_registration(self, user, session: dict, prompt: int, answer: str):
+        if not self.claim_prompt(user, session, prompt):
+            return
+        step, data = session["step"], session["data"]
+        session["tries"] = 0
+        await self.delete_prompt(user, prompt)
+        if step == "name":
+            data["nick"] = " ".join([word.capitalize() for word in answer.split()])
+            session["step"] = "term"
+        elif step == "term":
+            data["term"] = TERM_ROLES[session["options"].index(answer)]
+            session["step"] = "school"
+        elif step == "school" and answer == "Other":
+            session["step"] = "school_name"
+        elif step == "school":
+            data["school"] = answer
+            session["step"] = "team"
+        elif step == "school_name":
+            coop_guild = self.bot.get_guild(session["guild"])
+            new_school = answer.capitalize()
+            if new_school == "Other" or normalize_name(new_school) in [
+                normalize_name(role.name) for role in coop_guild.roles
+            ]:
+                await self.end_registration(
+                    user, title="Haha, very funny", description="Restart your registration punk ass edge testing bitch"
+                )
                 return
-            roles.append(await coop_guild.create_role(name=team_name, mentionable=True))
-            member = await coop_guild.fetch_member(ctx.message.author.id)
-            await member.edit(nick=nickname)
-            await member.add_roles(*roles)
-            register_role = coop_guild.get_role(config["guilds"][str(coop_guild.id)]["register"])
-            await member.remove_roles(register_role)
-            await send_msg(
-                ctx,
-                title="Successfully Registered",
-                description=f"You have successfully registered in the {coop_guild.name} discord server, please enjoy!"
+            data["school"] = new_school
+            session["step"] = "school_colour"
+        elif step == "school_colour":
+            data["colour"] = [int(color) for color in answer.strip().replace("(", "").replace(")", "").split(",")]
+            session["step"] = "team"
+        elif step == "team":
+            data["team"] = answer
+            await self.finish_registration(user, session)
+            return
+        await self.prompt_registration(user, session)
+
+    async def finish_registration(self, user, session: dict):
+        coop_guild = self.bot.get_guild(session["guild"])
+        data = session["data"]
+        roles = [discord.utils.get(coop_guild.roles, name=data["term"])]
+        if data.get("colour") is not None:
+            config["colleges"][data["school"]] = data["colour"]
+            roles.append(
+                await role_registry.get_or_create(
+                    coop_guild, "schools", data["school"], colour=Colour.from_rgb(*data["colour"]), mentionable=True
+                )
             )
-            config["members"].pop(str(ctx.message.author.id))
-            update_config()
         else:
-            await send_msg(
-                ctx,
-                title="Register Error",
-                description="You are not elegible to register for a server at this time. If you feel this is an error, please contact your server mod.",
+            roles.append(
+                role_registry.get(coop_guild, "schools", data["school"])
+                or discord.utils.get(coop_guild.roles, name=data["school"])
             )
+        roles.append(await role_registry.get_or_create(coop_guild, "teams", data["team"], mentionable=True))
+        member = coop_guild.get_member(user.id) or await coop_guild.fetch_member(user.id)
+        await member.edit(nick=data["nick"])
+        await member.add_roles(*roles)
+        register_role = coop_guild.get_role(config["guilds"][str(coop_guild.id)]["register"])
+        await member.remove_roles(register_role)
+        config["members"].pop(str(user.id), None)
+        update_config()
+        await self.end_registration(
+            user,
+            title="Successfully Registered",
+            description=f"You have successfully registered in the {coop_guild.name} discord server, please enjoy!",
+        )
+
+    @Cog.listener()
+    async def on_message(self, message):
+        if message.guild or message.author.bot or message.content.startswith(self.bot.command_prefix):
+            return
+        session = registrations.sessions.get(str(message.author.id))
+        if session is None or session["step"] not in REGISTER_PROMPTS:
+            return
+        prompt = session.get("prompt")
+        match = re.match(REGISTER_PROMPTS[session["step"]][2], message.content)
+        if match:
+            await self.advance_registration(message.author, session, prompt, match.group(0))
+            return
+        if not self.claim_prompt(message.author, session, prompt):
+            return
+        session["tries"] += 1
+        await self.delete_prompt(message.author, prompt)
+        if session["tries"] >= REGISTER_TRIES:
+            await self.end_registration(
+                message.author,
+                title="Text Input Failed",
+                description="Text has not been successfully inputed after three tries, please retry the command",
+            )
+        else:
+            await self.prompt_registration(message.author, session)
+
+    @Cog.listener()
+    async def on_raw_reaction_add(self, payload):
+        if payload.guild_id is not None or payload.user_id == self.bot.user.id:
+            return
+        session = registrations.sessions.get(str(payload.user_id))
+        if session is None or session.get("prompt") != payload.message_id or session["step"] not in REGISTER_MENUS:
+            return
+        icons = MENU_ICONS[: len(session["options"])]
+        if str(payload.emoji) not in icons:
+            return
+        answer = session["options"][icons.index(str(payload.emoji))]
+        user = self.bot.get_user(payload.user_id) or await self.bot.fetch_user(payload.user_id)
+        await self.advance_registration(user, session, payload.message_id, answer)
+
+    @loop(seconds=60)
+    async def expire_registrations(self):
+        now = datetime.now().timestamp()
+        for user_id, session in list(registrations.sessions.items()):
+            if session.get("expires", now) > now:
+                continue
+            try:
+                user = self.bot.get_user(int(user_id)) or await self.bot.fetch_user(int(user_id))
+                await self.delete_prompt(user, session.get("prompt"))
+                await self.end_registration(
+                    user,
+                    title="Timeout Reached",
+                    description="The timeout of five minutes has been reached, please retry the command",
+                )
+            except discord.HTTPException as e:
+                print(e)
+                registrations.sessions.pop(user_id, None)
+                registrations.dirty = True
+
+    @expire_registrations.before_loop
+    async def before_expire_registrations(self):
+        await self.bot.wait_until_ready()
+
+    @loop(seconds=REGISTER_SAVE_INTERVAL)
+    async def save_registrations(self):
+        if registrations.dirty:
+            registrations.save()
+
+    def cog_unload(self):
+        self.save_registrations.cancel()
+        if registrations.dirty:
+            registrations.save()
 
     @command(
         checks=[bot_only],
@@ -832,148 +1931,801 @@ class User(Cog, description="The base commands available to you"):
         description="Find the ghost op by number of messages sent",
     )
     async def ghost(self, ctx):
-        wait_msg = await send_msg(
-            ctx, title="Please Wait", description="Calculating the ghost op, please wait while this is done"
-        )
-        text_channels = []
-        for channel in await ctx.guild.fetch_channels():
-            if type(channel) == discord.TextChannel:
-                text_channels.append(channel)
-        ghost_ops = {}
-        for channel in text_channels:
-            async for msg in channel.history():
-                if msg.author.bot:
-                    continue
-                elif ghost_ops.get(msg.author.name) is None:
-                    ghost_ops[msg.author.name] = 1
-                else:
-                    ghost_ops[msg.author.name] += 1
-        await wait_msg.delete()
-        ghost_op = sorted([(k, v) for k, v in ghost_ops.items()], key=lambda x: x[1])[0]
+        if scan_ghost_ops.cached(ctx.guild):
+            ghost_op = (await scan_ghost_ops(ctx.guild))[0]
+        else:
+            wait_msg = await send_msg(
+                ctx, title="Please Wait", description="Calculating the ghost op, please wait while this is done"
+            )
+            ghost_op = (await scan_ghost_ops(ctx.guild))[0]
+            await wait_msg.delete()
         await send_msg(
             ctx,
             title="Ghost Op Found",
             description=f"The current ghost op is {ghost_op[0]} as they have only sent {ghost_op[1]} messages",
         )
 
-    @command(
-        brief="View the time until the next teatime", description="View the time until the next teatime is happening"
+    @group(
+        invoke_without_command=True,
+        brief="View the time until the next teatime",
+        description="View the time until the next teatime is happening",
     )
     async def teatime(self, ctx):
-        if config["guilds"][str(ctx.guild.id)].get("time") and datetime.now() < datetime.strptime(
-            config["guilds"][str(ctx.guild.id)]["time"]["end"], "%m/%d/%Y"
-        ):
-            next_teatime = await next_scheduled(*SCHEDULED["teatime"])
-            diff = next_teatime - datetime.now()
-            days, hours, minutes, seconds = (
-                diff.days,
-                diff.seconds // 3600,
-                (diff.seconds // 60) % 60,
-                diff.seconds % 60,
+        await self.show_countdown(ctx, "teatime")
+
+    @teatime.command(
+        name="stats",
+        checks=[guild_only],
+        brief="View teatime attendance",
+        description="View per-member teatime attendance and overlap over the term",
+    )
+    async def teatime_stats(self, ctx):
+        guild_config = config["guilds"][str(ctx.guild.id)]
+        if guild_config.get("time") is None:
+            await send_msg(ctx, title="Attendance Error", description="This server does not have a term configured")
+            return
+        start, end = term_window(guild_config)
+        stats = attendance_log(ctx.guild.id).stats(start, end + DAYS_TO_SECONDS)
+        if not stats:
+            await send_msg(ctx, title="Teatime Attendance", description="Nobody has joined teatime this term")
+            return
+        description = [f"{'Member':<24}{'Hours':>8}{'Days':>8}{'Overlap':>10}"]
+        for member_id, member_stats in sorted(stats.items(), key=lambda item: -item[1]["seconds"])[:20]:
+            member = ctx.guild.get_member(member_id)
+            name = member.display_name if member else str(member_id)
+            overlap = member_stats["overlap"] / member_stats["seconds"] if member_stats["seconds"] else 0
+            description.append(
+                f"{name[:23]:<24}{member_stats['seconds'] / 3600:>8.1f}{len(member_stats['days']):>8}{overlap:>10.0%}"
             )
+        await send_msg(ctx, title="Teatime Attendance", description=description)
+
+    @Cog.listener()
+    async def on_voice_state_update(self, member, before, after):
+        if before.channel == after.channel:
+            return
+        channel = teatime_voice(member.guild)
+        if channel is None:
+            return
+        now = datetime.now().timestamp()
+        if before.channel == channel:
+            attendance_log(member.guild.id).leave(member.id, now)
+        if after.channel == channel:
+            attendance_log(member.guild.id).join(member.id, now)
+
+    @Cog.listener()
+    async def on_ready(self):
+        now = datetime.now().timestamp()
+        for guild in self.bot.guilds:
+            channel = teatime_voice(guild)
+            if channel is not None:
+                for member in channel.members:
+                    attendance_log(guild.id).join(member.id, now)
+
+
+    @command(brief="View the time until the next timecard", description="View the time until the next timecard is due")
+    async def timecard(self, ctx):
+        await self.show_countdown(ctx, "timecard")
+
+    async def countdown_target(self, guild_config: dict, kind: str) -> Optional[datetime]:
+        if guild_config.get("time") is None:
+            return None
+        target = await next_scheduled(*SCHEDULED[kind])
+        if target.timestamp() > term_window(guild_config)[1]:
+            return None
+        return target
+
+    async def show_countdown(self, ctx, kind: str):
+        guild_config = config["guilds"][str(ctx.guild.id)]
+        target = await self.countdown_target(guild_config, kind)
+        countdown = guild_config.get("countdowns", {}).get(kind)
+        if target is None:
+            await ctx.channel.send(embed=countdown_embed(kind, None))
+        elif countdown is None:
+            msg = await ctx.channel.send(embed=countdown_embed(kind, target))
+            await msg.pin()
+            guild_config.setdefault("countdowns", {})[kind] = [ctx.channel.id, msg.id]
+            update_config()
+        elif countdown[0] == ctx.channel.id:
+            await ctx.message.add_reaction("📌")
+        else:
+            await ctx.channel.send(f"https://discord.com/channels/{ctx.guild.id}/{countdown[0]}/{countdown[1]}")
+
+    async def edit_countdown(self, guild_config: dict, kind: str, target: Optional[datetime]):
+        channel_id, message_id = guild_config["countdowns"][kind]
+        channel = self.bot.get_channel(channel_id)
+        if channel is None:
+            return time.monotonic() + COUNTDOWN_CADENCE[-1][1]
+        try:
+            await channel.get_partial_message(message_id).edit(embed=countdown_embed(kind, target))
+        except discord.NotFound:
+            target = None
+        if target is None:
+            guild_config["countdowns"].pop(kind)
+            update_config()
+            return None
+        remaining = (target - datetime.now()).total_seconds()
+        return time.monotonic() + max(COUNTDOWN_TICK, min(countdown_cadence(remaining), remaining))
+
+    @loop(seconds=COUNTDOWN_TICK)
+    async def tick_countdowns(self):
+        now = time.monotonic()
+        due = []
+        for guild_id, guild_config in config["guilds"].items():
+            for kind in list(guild_config.get("countdowns", {})):
+                if self.countdown_edits.get((guild_id, kind), 0) <= now:
+                    due.append((guild_id, kind, await self.countdown_target(guild_config, kind)))
+        semaphore = asyncio.Semaphore(COUNTDOWN_CONCURRENCY)
+
+        async def edit(guild_id: str, kind: str, target: Optional[datetime]):
+            async with semaphore:
+                try:
+                    next_edit = await self.edit_countdown(config["guilds"][guild_id], kind, target)
+                except discord.HTTPException as e:
+                    print(e)
+                    next_edit = time.monotonic() + COUNTDOWN_CADENCE[-1][1]
+            if next_edit is None:
+                self.countdown_edits.pop((guild_id, kind), None)
+            else:
+                self.countdown_edits[(guild_id, kind)] = next_edit
+
+        await asyncio.gather(*[edit(*countdown) for countdown in due])
+
+    @tick_countdowns.before_loop
+    async def before_tick_countdowns(self):
+        await self.bot.wait_until_ready()
+
+    async def schedule_jobs(self):
+        now = datetime.now().timestamp()
+        for guild_id, v in config["guilds"].items():
+            if v.get("important") is None or v.get("time") is None:
+                continue
+            start, end = term_window(v)
+            for kind in ("teatime", "timecard"):
+                if kind == "teatime" and v.get("teatime") is None:
+                    continue
+                due = (await next_scheduled(*SCHEDULED[kind])).timestamp()
+                if start < due < end:
+                    enqueue_job(kind, guild_id, due)
+            due = end + END_OF_TERM_OFFSET
+            if now < due + JOB_GRACE:
+                enqueue_job("end_of_term", guild_id, due)
+
+    async def deliver_job(self, job: dict):
+        job["status"], job["attempts"] = "sending", job["attempts"] + 1
+        update_config()
+        try:
+            title, description = JOB_MESSAGES[job["kind"]]
+            guild_config = config["guilds"][job["guild"]]
+            channel = self.bot.get_channel(guild_config["important"])
+            if channel is None:
+                raise LookupError("important channel not found")
             await send_msg(
-                ctx,
-                title="Next Teatime",
-                description=f"The next teatime is happening in {days} days, {hours} hours, {minutes} minutes, and {seconds} seconds.",
+                None,
+                title=title,
+                description=description,
+                channel=channel,
+                alter=persona_for(guild_config, job["kind"]),
             )
+        except Exception as e:
+            print(e)
+            job["status"] = "pending" if job["attempts"] < JOB_ATTEMPTS else "failed"
+            job["error"] = f"{type(e).__name__}: {e}"
         else:
-            await send_msg(ctx, title="No Teatime", description="There are no more teatimes for you to join")
-
-    @loop()
-    async def notify_teatime(self):
-        wait = await next_scheduled(*SCHEDULED["teatime"]) - datetime.now()
-        await asyncio.sleep(wait.days * DAYS_TO_SECONDS + wait.seconds)
-        for _, v in config["guilds"].items():
-            if v.get("teatime") is None or v.get("time") is None:
+            job["status"], job["error"] = "sent", None
+        job["finished"] = int(datetime.now().timestamp())
+        update_config()
+
+    @loop(seconds=JOB_INTERVAL)
+    async def run_jobs(self):
+        jobs_before = len(config["jobs"])
+        await self.schedule_jobs()
+        changed = len(config["jobs"]) != jobs_before
+        now = datetime.now().timestamp()
+        for job in sorted(config["jobs"].values(), key=lambda job: job["due"]):
+            if job["status"] != "pending" or job["due"] > now:
                 continue
-            if (
-                datetime.strptime(v["time"]["start"], "%m/%d/%Y")
-                < datetime.now()
-                < datetime.strptime(v["time"]["end"], "%m/%d/%Y")
-            ):
-                await send_msg(
-                    None,
-                    title="Teatime",
-                    description="Its teatime, join up in the teatime voice channel",
-                    channel=self.bot.get_channel(v["important"]),
-                )
+            if now - job["due"] > JOB_GRACE:
+                job["status"], job["finished"] = "expired", int(now)
+                changed = True
+            else:
+                await self.deliver_job(job)
+        for key, job in list(config["jobs"].items()):
+            if job["status"] != "pending" and job["due"] < now - JOB_RETENTION:
+                config["jobs"].pop(key)
+                changed = True
+        if changed:
+            update_config()
 
-    @notify_teatime.before_loop
-    async def before_notify_teatime(self):
+    @run_jobs.before_loop
+    async def before_run_jobs(self):
         await self.bot.wait_until_ready()
 
-    @command(brief="View the time until the next timecard", description="View the time until the next timecard is due")
-    async def timecard(self, ctx):
-        if config["guilds"][str(ctx.guild.id)].get("time") and datetime.now() < datetime.strptime(
-            config["guilds"][str(ctx.guild.id)]["time"]["end"], "%m/%d/%Y"
-        ):
-            next_timecard = await next_scheduled(*SCHEDULED["timecard"])
-            diff = next_timecard - datetime.now()
-            days, hours, minutes, seconds = (
-                diff.days,
-                diff.seconds // 3600,
-                (diff.seconds // 60) % 60,
-                diff.seconds % 60,
-            )
-            await send_msg(
-                ctx,
-                title="Next Timecard",
-                description=f"The next timecard is due in {days} days, {hours} hours, {minutes} minutes, and {seconds} seconds.",
+
+def shingle_sketch(content: str) -> Tuple[int, ...]:
+    text = " ".join(content.casefold().split())[:2000]
+    if len(text) <= DUPLICATE_SHINGLE:
+        return ()
+    power = pow(HASH_BASE, DUPLICATE_SHINGLE - 1, HASH_MODULUS)
+    rolling = 0
+    for char in text[:DUPLICATE_SHINGLE]:
+        rolling = (rolling * HASH_BASE + ord(char)) % HASH_MODULUS
+    hashes = {rolling}
+    for i in range(DUPLICATE_SHINGLE, len(text)):
+        rolling = ((rolling - ord(text[i - DUPLICATE_SHINGLE]) * power) * HASH_BASE + ord(text[i])) % HASH_MODULUS
+        hashes.add(rolling)
+    return tuple(heapq.nsmallest(DUPLICATE_SKETCH, hashes))
+
+
+def sketch_similarity(first: Tuple[int, ...], second: Tuple[int, ...]) -> float:
+    union = heapq.nsmallest(DUPLICATE_SKETCH, set(first) | set(second))
+    shared = set(first) & set(second)
+    return sum(1 for value in union if value in shared) / len(union)
+
+
+class MessageWindow:
+    __slots__ = ("times", "index", "sketches", "sketch_times", "sketch_index", "strikes", "last_strike")
+
+    def __init__(self):
+        self.times = array("d", [0.0] * FLOOD_MESSAGES)
+        self.index = 0
+        self.sketches = [None] * DUPLICATE_HISTORY
+        self.sketch_times = array("d", [0.0] * DUPLICATE_HISTORY)
+        self.sketch_index = 0
+        self.strikes = 0
+        self.last_strike = 0.0
+
+    def flooding(self, now: float) -> bool:
+        oldest = self.times[self.index]
+        self.times[self.index] = now
+        self.index = (self.index + 1) % FLOOD_MESSAGES
+        return oldest > 0 and now - oldest < FLOOD_WINDOW
+
+    def repeating(self, sketch: Tuple[int, ...], now: float) -> bool:
+        repeats = sum(
+            1
+            for previous, sent in zip(self.sketches, self.sketch_times)
+            if previous is not None
+            and now - sent < DUPLICATE_WINDOW
+            and sketch_similarity(sketch, previous) >= DUPLICATE_SIMILARITY
+        )
+        self.sketches[self.sketch_index] = sketch
+        self.sketch_times[self.sketch_index] = now
+        self.sketch_index = (self.sketch_index + 1) % DUPLICATE_HISTORY
+        return repeats >= DUPLICATE_REPEATS
+
+    def latest(self) -> float:
+        return self.times[self.index - 1]
+
+
+class Moderation(Cog, description="The moderation features running in the background"):
+    def __init__(self, bot):
+        self.bot = bot
+        self.windows = {}
+        config.setdefault("mutes", {})
+        self.lift_mutes.start()
+        self.prune_windows.start()
+
+    async def exempt(self, message) -> bool:
+        guild_config = config["guilds"].get(str(message.guild.id))
+        if guild_config is None or message.author.bot or message.channel.id == guild_config.get("bot"):
+            return True
+        if message.content.startswith(self.bot.command_prefix):
+            return True
+        if message.author.id == message.guild.owner_id or await self.bot.is_owner(message.author):
+            return True
+        staff = {guild_config.get("mod"), guild_config.get("admin")}
+        return any(role.id in staff for role in message.author.roles)
+
+    @Cog.listener()
+    async def on_message(self, message):
+        if message.guild is None or not isinstance(message.author, discord.Member) or await self.exempt(message):
+            return
+        now = time.monotonic()
+        window = self.windows.get((message.channel.id, message.author.id))
+        if window is None:
+            window = self.windows[(message.channel.id, message.author.id)] = MessageWindow()
+        flooding = window.flooding(now)
+        sketch = shingle_sketch(message.content)
+        repeating = bool(sketch) and window.repeating(sketch, now)
+        if not flooding and not repeating:
+            if now - window.last_strike > FLOOD_WINDOW:
+                window.strikes = 0
+            return
+        window.strikes += 1
+        window.last_strike = now
+        try:
+            await message.delete()
+        except discord.NotFound:
+            pass
+        reason = "flooding" if flooding else "repeating messages"
+        if window.strikes >= FLOOD_STRIKES:
+            window.strikes = 0
+            await self.mute(message.author, message.channel, reason)
+        elif window.strikes == 1:
+            await self.report(
+                message.guild,
+                title="Spam Removed",
+                description=f"Removed a message from {message.author.display_name} in #{message.channel.name} for {reason}",
             )
-        else:
-            await send_msg(ctx, title="No Timecard", description="There are no more timecards for you to turn in")
 
-    @loop()
-    async def notify_timecard(self):
-        wait = await next_scheduled(*SCHEDULED["timecard"]) - datetime.now()
-        await asyncio.sleep(wait.days * DAYS_TO_SECONDS + wait.seconds)
-        for _, v in config["guilds"].items():
-            if v.get("important") is None or v.get("time") is None:
+    async def mute(self, member, channel, reason: str):
+        key = f"{channel.id}:{member.id}"
+        overwrite = channel.overwrites_for(member)
+        mute = config["mutes"].get(key) or {
+            "overwrite": None if overwrite.is_empty() else [permissions.value for permissions in overwrite.pair()]
+        }
+        overwrite.send_messages = False
+        await channel.set_permissions(member, overwrite=overwrite, reason=f"Automatic mute for {reason}")
+        mute["until"] = int(datetime.now().timestamp()) + FLOOD_MUTE
+        config["mutes"][key] = mute
+        update_config()
+        await self.report(
+            member.guild,
+            title="Member Muted",
+            description=f"{member.display_name} has been muted in #{channel.name} for {FLOOD_MUTE // 60} minutes for {reason}",
+        )
+
+    async def report(self, guild, title: str, description: str):
+        channel = self.bot.get_channel(config["guilds"][str(guild.id)].get("mod-bot"))
+        if channel is not None:
+            await send_msg(None, title=title, description=description, channel=channel)
+
+    @loop(seconds=30)
+    async def lift_mutes(self):
+        now = datetime.now().timestamp()
+        for key, mute in list(config["mutes"].items()):
+            if mute["until"] > now:
                 continue
-            if (
-                datetime.strptime(v["time"]["start"], "%m/%d/%Y")
-                < datetime.now()
-                < datetime.strptime(v["time"]["end"], "%m/%d/%Y")
-            ):
-                await send_msg(
-                    None,
-                    title="Timecard Notification",
-                    description="Your timecards are due today",
-                    channel=self.bot.get_channel(v["important"]),
-                )
+            channel_id, member_id = (int(part) for part in key.split(":"))
+            channel = self.bot.get_channel(channel_id)
+            member = channel.guild.get_member(member_id) if channel is not None else None
+            if member is not None:
+                overwrite = None
+                if mute["overwrite"] is not None:
+                    overwrite = discord.PermissionOverwrite.from_pair(
+                        *(discord.Permissions(value) for value in mute["overwrite"])
+                    )
+                try:
+                    await channel.set_permissions(member, overwrite=overwrite, reason="Automatic mute expired")
+                except discord.NotFound:
+                    pass
+                except discord.HTTPException as e:
+                    print(e)
+                    continue
+            config["mutes"].pop(key)
+            update_config()
 
-    @notify_timecard.before_loop
-    async def before_notify_timecard(self):
+    @lift_mutes.before_loop
+    async def before_lift_mutes(self):
         await self.bot.wait_until_ready()
 
-    @loop()
-    async def notify_end_of_term(self):
-        end_of_terms = []
-        for _, v in config["guilds"].items():
-            if v.get("time") and datetime.now() < datetime.strptime(f"{v['time']['end']}:23", "%m/%d/%Y:%H"):
-                end_of_terms.append(v)
-        if len(end_of_terms) == 0:
-            await asyncio.sleep(86400)
-        else:
-            next_end = sorted(end_of_terms, key=lambda x: datetime.strptime(x["time"]["end"], "%m/%d/%Y"))[0]
-            await asyncio.sleep(
-                int(
-                    datetime.now().timestamp()
-                    - datetime.strptime(next_end["time"]["end"], "%m/%d/%Y").timestamp()
-                    - 10800
-                )
+    @loop(minutes=5)
+    async def prune_windows(self):
+        now = time.monotonic()
+        for key in [key for key, window in self.windows.items() if now - window.latest() > FLOOD_WINDOW]:
+            self.windows.pop(key)
+
+
+def write_varints(values, out: bytearray):
+    for value in values:
+        while value >= 0x80:
+            out.append(value & 0x7F | 0x80)
+            value >>= 7
+        out.append(value)
+
+
+def read_varints(data: bytes, offset: int, count: int) -> Tuple[List[int], int]:
+    values = []
+    for _ in range(count):
+        value = shift = 0
+        while True:
+            byte = data[offset]
+            offset += 1
+            value |= (byte & 0x7F) << shift
+            shift += 7
+            if byte < 0x80:
+                break
+        values.append(value)
+    return values, offset
+
+
+def deltas(values) -> List[int]:
+    return [value - previous for previous, value in zip(itertools.chain([0], values), values)]
+
+
+def tokenize(text: str) -> dict:
+    counts = {}
+    for token in re.findall(r"[a-z0-9]+", text.lower()):
+        if len(token) > 1 and token not in SEARCH_STOP_WORDS:
+            counts[token] = min(255, counts.get(token, 0) + 1)
+    return counts
+
+
+def message_text(content: str, embeds: List[Embed]) -> str:
+    parts = [content]
+    for embed in embeds:
+        parts += [embed.title or "", embed.description or ""]
+    return " ".join(part for part in parts if isinstance(part, str))
+
+
+class SearchIndex:
+    def __init__(self, guild_id: int):
+        self.path = INDEX_PATH / f"{guild_id}.idx"
+        self.docs = {}
+        self.postings = {}
+        self.stale = {}
+        self.dirty = False
+        if self.path.exists():
+            with open(self.path, "rb") as index_file:
+                self.load(zlib.decompress(index_file.read()))
+
+    def load(self, data: bytes):
+        (count,), offset = read_varints(data, 0, 1)
+        ids, offset = read_varints(data, offset, count)
+        channels, offset = read_varints(data, offset, count)
+        authors, offset = read_varints(data, offset, count)
+        ids = list(itertools.accumulate(ids))
+        self.docs = {doc_id: (channel, author) for doc_id, channel, author in zip(ids, channels, authors)}
+        (terms,), offset = read_varints(data, offset, 1)
+        for _ in range(terms):
+            (length, count), offset = read_varints(data, offset, 2)
+            term = data[offset : offset + length].decode()
+            doc_ids, offset = read_varints(data, offset + length, count)
+            self.postings[term] = (array("Q", itertools.accumulate(doc_ids)), array("B", data[offset : offset + count]))
+            offset += count
+
+    def save(self):
+        out = bytearray()
+        ids = sorted(self.docs)
+        write_varints([len(ids)], out)
+        write_varints(deltas(ids), out)
+        write_varints([self.docs[doc_id][0] for doc_id in ids], out)
+        write_varints([self.docs[doc_id][1] for doc_id in ids], out)
+        live = {}
+        for term, (doc_ids, counts) in self.postings.items():
+            live[term] = [
+                (doc_id, count)
+                for doc_id, count in zip(doc_ids, counts)
+                if doc_id in self.docs and doc_id not in self.stale
+            ]
+        for doc_id, terms in self.stale.items():
+            for term, count in terms.items():
+                if doc_id in self.docs:
+                    live.setdefault(term, []).append((doc_id, count))
+        postings = {}
+        for term, entries in live.items():
+            if entries:
+                entries.sort()
+                doc_ids, counts = zip(*entries)
+                postings[term] = (array("Q", doc_ids), array("B", counts))
+        self.postings, self.stale = postings, {}
+        write_varints([len(postings)], out)
+        for term, (doc_ids, counts) in postings.items():
+            encoded = term.encode()
+            write_varints([len(encoded), len(doc_ids)], out)
+            out += encoded
+            write_varints(deltas(doc_ids), out)
+            out += counts.tobytes()
+        INDEX_PATH.mkdir(exist_ok=True)
+        with open(self.path, "wb") as index_file:
+            index_file.write(zlib.compress(bytes(out)))
+        self.dirty = False
+
+    def add(self, message_id: int, channel_id: int, author_id: int, text: str):
+        self.docs[message_id] = (channel_id, author_id)
+        self.dirty = True
+        if message_id in self.stale:
+            self.stale[message_id] = tokenize(text)
+            return
+        for term, count in tokenize(text).items():
+            doc_ids, counts = self.postings.setdefault(term, (array("Q"), array("B")))
+            doc_ids.append(message_id)
+            counts.append(count)
+
+    def remove(self, message_id: int, text: Optional[str] = None):
+        self.docs.pop(message_id, None)
+        self.dirty = True
+        if message_id in self.stale:
+            self.stale[message_id] = {}
+            return
+        for term in tokenize(text or ""):
+            if term in self.postings:
+                doc_ids, counts = self.postings[term]
+                for i in [i for i, doc_id in enumerate(doc_ids) if doc_id == message_id][::-1]:
+                    del doc_ids[i]
+                    del counts[i]
+
+    def invalidate(self, message_id: int):
+        self.docs.pop(message_id, None)
+        self.stale[message_id] = {}
+        self.dirty = True
+
+    def search(
+        self,
+        query: str,
+        channel_id: Optional[int] = None,
+        author_id: Optional[int] = None,
+        after: Optional[float] = None,
+        before: Optional[float] = None,
+        channels: Optional[set] = None,
+    ) -> List[Tuple[float, int]]:
+        min_id = discord.utils.time_snowflake(datetime.fromtimestamp(after)) if after else 0
+        max_id = discord.utils.time_snowflake(datetime.fromtimestamp(before), high=True) if before else 1 << 64
+        scores = {}
+        for term in tokenize(query):
+            doc_ids, counts = self.postings.get(term, ((), ()))
+            postings = [(doc_id, count) for doc_id, count in zip(doc_ids, counts) if doc_id not in self.stale]
+            postings += [(doc_id, terms[term]) for doc_id, terms in self.stale.items() if term in terms]
+            if not postings:
+                continue
+            idf = math.log(1 + len(self.docs) / len(postings))
+            for doc_id, count in postings:
+                if not min_id <= doc_id <= max_id or doc_id not in self.docs:
+                    continue
+                channel, author = self.docs[doc_id]
+                if (channel_id and channel != channel_id) or (author_id and author != author_id):
+                    continue
+                if channels is not None and channel not in channels:
+                    continue
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * (1 + math.log(count))
+        return heapq.nlargest(SEARCH_RESULTS, ((score, doc_id) for doc_id, score in scores.items()))
+
+
+search_indexes = {}
+
+
+def search_index(guild_id: int) -> SearchIndex:
+    if guild_id not in search_indexes:
+        search_indexes[guild_id] = SearchIndex(guild_id)
+    return search_indexes[guild_id]
+
+
+class Search(Cog, description="The search commands available to you"):
+    def __init__(self, bot):
+        self.bot = bot
+        self.save_indexes.start()
+
+    def cog_unload(self):
+        self.save_indexes.cancel()
+        for index in search_indexes.values():
+            if index.dirty:
+                index.save()
+
+    @Cog.listener()
+    async def on_message(self, message):
+        if message.guild is not None and str(message.guild.id) in config["guilds"]:
+            search_index(message.guild.id).add(
+                message.id, message.channel.id, message.author.id, message_text(message.content, message.embeds)
             )
-            announce = await self.bot.fetch_channel(next_end["important"])
-            await send_msg(
-                None,
-                title="Congratulations!!!",
-                description="Congrats on reaching the end of term!",
-                channel=announce,
+
+    @Cog.listener()
+    async def on_raw_message_edit(self, payload):
+        if payload.guild_id is None or str(payload.guild_id) not in config["guilds"]:
+            return
+        data, before = payload.data, payload.cached_message
+        if "content" not in data and ("embeds" not in data or before is None):
+            return
+        content = data.get("content", before.content if before else "")
+        if "embeds" in data:
+            embeds = [Embed.from_dict(embed) for embed in data["embeds"]]
+        else:
+            embeds = before.embeds if before else []
+        author = data.get("author", {}).get("id") or (before.author.id if before else 0)
+        index = search_index(payload.guild_id)
+        if before is not None:
+            index.remove(payload.message_id, message_text(before.content, before.embeds))
+        else:
+            index.invalidate(payload.message_id)
+        index.add(payload.message_id, payload.channel_id, int(author), message_text(content, embeds))
+
+    @Cog.listener()
+    async def on_raw_message_delete(self, payload):
+        if payload.guild_id is not None and str(payload.guild_id) in config["guilds"]:
+            search_index(payload.guild_id).remove(payload.message_id)
+
+    @loop(minutes=5)
+    async def save_indexes(self):
+        for index in search_indexes.values():
+            if index.dirty:
+                index.save()
+
+    @command(
+        checks=[guild_only],
+        brief="Search past messages",
+        description="Search past messages, filter with in:#channel from:@member after:MM/DD/YYYY before:MM/DD/YYYY",
+    )
+    async def search(self, ctx, *query):
+        terms, filters = [], {}
+        for word in query:
+            key, _, value = word.partition(":")
+            if key in ("in", "from", "after", "before") and value:
+                filters[key] = value
+            else:
+                terms.append(word)
+        channel_id = author_id = after = before = None
+        try:
+            if "in" in filters:
+                channel_id = int(filters["in"].strip("<#>"))
+            if "from" in filters:
+                member = await find_member(ctx, filters["from"])
+                if member is None:
+                    return
+                author_id = member.id
+            if "after" in filters:
+                after = datetime.strptime(filters["after"], "%m/%d/%Y").timestamp()
+            if "before" in filters:
+                before = datetime.strptime(filters["before"], "%m/%d/%Y").timestamp() + DAYS_TO_SECONDS
+        except ValueError:
+            await send_msg(ctx, title="Search Error", description="Search filters could not be read")
+            return
+        readable = {
+            channel.id for channel in ctx.guild.text_channels if channel.permissions_for(ctx.author).read_messages
+        }
+        results = search_index(ctx.guild.id).search(" ".join(terms), channel_id, author_id, after, before, readable)
+        if not results:
+            await send_msg(ctx, title="Search Results", description="No messages matched your search")
+            return
+        description = []
+        for _, message_id in results:
+            channel_id, author_id = search_index(ctx.guild.id).docs[message_id]
+            channel, author = ctx.guild.get_channel(channel_id), ctx.guild.get_member(author_id)
+            sent = discord.utils.snowflake_time(message_id).strftime("%m/%d/%Y")
+            description.append(
+                f"[{sent}](https://discord.com/channels/{ctx.guild.id}/{channel_id}/{message_id}) "
+                f"#{channel.name if channel else 'deleted'} {author.display_name if author else 'unknown'}"
             )
+        await send_msg(ctx, title="Search Results", description=description, wrap=False)
 
-    @notify_end_of_term.before_loop
-    async def before_notify_timecard(self):
-        await self.bot.wait_until_ready()
+    @command(
+        checks=[mod_only],
+        brief="Rebuild the search index",
+        description="Rebuild the search index from the full message history",
+    )
+    async def reindex(self, ctx):
+        wait_msg = await send_msg(ctx, title="Please Wait", description="Indexing the message history, please wait")
+        index = search_index(ctx.guild.id)
+        index.docs, index.postings, index.stale = {}, {}, {}
+        for channel in ctx.guild.text_channels:
+            try:
+                async for msg in channel.history(limit=None):
+                    index.add(msg.id, channel.id, msg.author.id, message_text(msg.content, msg.embeds))
+            except discord.Forbidden:
+                continue
+        index.save()
+        await wait_msg.delete()
+        await send_msg(ctx, title="Index Rebuilt", description=f"{len(index.docs)} messages have been indexed")
+
+
+def self_assignable(role: discord.Role) -> bool:
+    if role.managed or role.is_default() or role.name in RESERVED_ROLES:
+        return False
+    guild_config = config["guilds"].get(str(role.guild.id), {})
+    if role.id in [guild_config.get(key) for key in ("admin", "mod", "register")]:
+        return False
+    return role.permissions.is_subset(discord.Permissions(**MEMBER_PERMISSIONS))
+
+
+class ReactionRoles(Cog, description="The reaction role commands available to you"):
+    def __init__(self, bot):
+        self.bot = bot
+        self.menus = {}
+        self.pending = {}
+        self.flush_task = None
+        for guild_config in config["guilds"].values():
+            for message_id, menu in guild_config.get("reaction_roles", {}).items():
+                self.menus[int(message_id)] = menu["roles"]
+
+    @Cog.listener()
+    async def on_raw_reaction_add(self, payload):
+        self.queue_role(payload, True)
+
+    @Cog.listener()
+    async def on_raw_reaction_remove(self, payload):
+        self.queue_role(payload, False)
+
+    @Cog.listener()
+    async def on_raw_message_delete(self, payload):
+        if payload.message_id in self.menus:
+            self.menus.pop(payload.message_id)
+            config["guilds"][str(payload.guild_id)]["reaction_roles"].pop(str(payload.message_id), None)
+            update_config()
+
+    def queue_role(self, payload, add: bool):
+        menu = self.menus.get(payload.message_id)
+        if menu is None or payload.guild_id is None or payload.user_id == self.bot.user.id:
+            return
+        role_id = menu.get(str(payload.emoji))
+        if role_id is None:
+            return
+        self.pending.setdefault((payload.guild_id, payload.user_id), {})[role_id] = add
+        if self.flush_task is None or self.flush_task.done():
+            self.flush_task = asyncio.ensure_future(self.flush_roles())
+
+    async def flush_roles(self):
+        while self.pending:
+            await asyncio.sleep(ROLE_BATCH_DELAY)
+            pending, self.pending = self.pending, {}
+            for (guild_id, user_id), changes in pending.items():
+                await self.apply_roles(guild_id, user_id, changes)
+
+    async def apply_roles(self, guild_id: int, user_id: int, changes: dict):
+        guild = self.bot.get_guild(guild_id)
+        if guild is None:
+            return
+        try:
+            member = guild.get_member(user_id) or await guild.fetch_member(user_id)
+            current = {role.id: role for role in member.roles if not role.is_default()}
+            roles = dict(current)
+            for role_id, add in changes.items():
+                role = guild.get_role(role_id)
+                if role is None or not self_assignable(role) or role >= guild.me.top_role:
+                    continue
+                if add:
+                    roles[role_id] = role
+                else:
+                    roles.pop(role_id, None)
+            if roles.keys() != current.keys():
+                await member.edit(roles=list(roles.values()), reason="Reaction role menu")
+        except discord.HTTPException as e:
+            print(e)
+
+    @command(
+        checks=[mod_only],
+        brief="Create a reaction role menu",
+        description="Create a reaction role menu with !rolemenu #channel <emoji> @role [<emoji> @role ...]",
+    )
+    async def rolemenu(self, ctx, channel: discord.TextChannel, *pairs):
+        if len(pairs) == 0 or len(pairs) % 2 != 0:
+            await send_msg(ctx, title="Role Menu Error", description="Role menus need pairs of an emoji and a role")
+            return
+        roles = {}
+        for emoji, role in zip(pairs[::2], pairs[1::2]):
+            try:
+                roles[emoji] = await RoleConverter().convert(ctx, role)
+            except BadArgument:
+                await send_msg(ctx, title="Role Menu Error", description=f"No role found with the name {role}")
+                return
+            if not self_assignable(roles[emoji]) or roles[emoji] >= ctx.author.top_role:
+                await send_msg(
+                    ctx, title="Role Menu Error", description=f"{roles[emoji].name} cannot be handed out by a role menu"
+                )
+                return
+        msg = await send_msg(
+            ctx,
+            title="Pick Your Roles",
+            description="\n".join(f"{emoji} : {role.name}" for emoji, role in roles.items()),
+            channel=channel,
+            wrap=False,
+        )
+        for emoji in roles:
+            await msg.add_reaction(emoji)
+        self.menus[msg.id] = {emoji: role.id for emoji, role in roles.items()}
+        config["guilds"][str(ctx.guild.id)].setdefault("reaction_roles", {})[str(msg.id)] = {
+            "channel": channel.id,
+            "roles": self.menus[msg.id],
+        }
+        update_config()
+        await send_msg(ctx, title="Role Menu Created", description=f"A role menu has been created in {channel.name}")
+
+    @command(
+        checks=[mod_only],
+        brief="Delete a reaction role menu",
+        description="Delete a reaction role menu by its message id",
+    )
+    async def delrolemenu(self, ctx, message_id: int):
+        menu = config["guilds"][str(ctx.guild.id)].get("reaction_roles", {}).pop(str(message_id), None)
+        if menu is None:
+            await send_msg(ctx, title="Role Menu Error", description=f"No role menu found with the id {message_id}")
+            return
+        self.menus.pop(message_id, None)
+        update_config()
+        channel = ctx.guild.get_channel(menu["channel"])
+        if channel is not None:
+            try:
+                await channel.get_partial_message(message_id).delete()
+            except discord.NotFound:
+                pass
+        await send_msg(ctx, title="Role Menu Deleted", description=f"The role menu {message_id} has been deleted")
 
 
 class Utility(Cog, description="The utility commands available to you"):
@@ -1002,25 +2754,75 @@ class Utility(Cog, description="The utility commands available to you"):
         )
 
 
+help_cache = {}
+
+
 class CustomHelpCommand(DefaultHelpCommand):
+    async def help_key(self) -> Tuple[str, str]:
+        ctx = self.context
+        if ctx.guild is None:
+            return ("owner" if await ctx.bot.is_owner(ctx.author) else "member"), "dm"
+        context = await permission_context(ctx)
+        permission = "owner" if context.owner else "mod" if context.mod else "member"
+        if ctx.channel.id == context.bot_channel:
+            return permission, "bot"
+        if ctx.channel.id == context.mod_channel:
+            return permission, "mod-bot"
+        return permission, "other"
+
+    async def send_bot_help(self, mapping):
+        key = await self.help_key()
+        if key in help_cache:
+            await self.send_embeds(help_cache[key])
+            return
+        self.cache_key = key
+        await super().send_bot_help(mapping)
+
     async def send_pages(self):
+        pages = list(self.paginator.pages)
+        key = getattr(self, "cache_key", None)
+        if key is not None:
+            help_cache[key] = pages
+            self.cache_key = None
+        await self.send_embeds(pages)
+
+    async def send_embeds(self, pages: List[str]):
         destination = self.get_destination()
-        embed = discord.Embed(
-            color=discord.Color.from_rgb(*ADTRAN_BLURPLE),
-            description="",
-            title="Co-op Command Guide",
-        )
-        for page in self.paginator.pages:
-            embed.description += page
-        await destination.send(embed=embed)
+        descriptions = [""]
+        for page in pages:
+            if descriptions[-1] and len(descriptions[-1]) + len(page) > HELP_EMBED_LIMIT:
+                descriptions.append("")
+            descriptions[-1] += page
+        for i, description in enumerate(descriptions):
+            embed = discord.Embed(
+                color=discord.Color.from_rgb(*ADTRAN_BLURPLE),
+                description=description,
+                title="Co-op Command Guide" if i == 0 else Embed.Empty,
+            )
+            await destination.send(embed=embed)
 
 
-def main():
-    load_dotenv()
+def build_bot() -> Bot:
     bot = Bot(command_prefix="!", intents=Intents.all())
     bot.add_cog(Owner(bot))
     bot.add_cog(Admin(bot))
     bot.add_cog(User(bot))
+    bot.add_cog(Moderation(bot))
+    bot.add_cog(Search(bot))
+    bot.add_cog(ReactionRoles(bot))
     bot.add_cog(Utility(bot))
     bot.help_command = CustomHelpCommand(no_category="Help")
+    for event in SINGLE_FLIGHT_INVALIDATORS:
+        bot.add_listener(single_flight_invalidator(event), f"on_{event}")
+    return bot
+
+
+def main():
+    load_dotenv()
+    bot = build_bot()
+    if os.getenv("TRACE_PATH"):
+        from adtn_coop_bot.replay import Recorder
+
+        bot.add_cog(Recorder(bot, Path(os.getenv("TRACE_PATH"))))
     bot.run(os.getenv("DISCORD_API_TOKEN"))
+
@@ -0,0 +1,296 @@
+import os
+import re
+import gzip
+import json
+import time
+import asyncio
+import argparse
+import hashlib
+import tempfile
+import itertools
+from pathlib import Path
+from datetime import datetime
+from typing import Any, List, Optional, Union
+
+import discord
+from discord.ext.commands import Cog
+
+from adtn_coop_bot import adtn_coop_bot as coop
+from adtn_coop_bot.adtn_coop_bot import ALTERS, GUILD_TEMPLATE, build_bot, config, directory, registrations
+
+
+TRACE_VERSION = 1
+TRACE_SCRUBBED = ["email", "avatar", "banner", "bio", "phone"]
+TRACE_TEXT = ["title", "description", "value", "text", "topic", "state", "details"]
+TRACE_CONFIG = ["guilds", "colleges", "members", "mods"]
+TRACE_GUILD_DROPPED = ["joins", "emojis"]
+TRACE_TOKENS = re.compile(r"<(@!?|@&|#)(\d+)>|<(a?):(\w+):(\d+)>|[^\W\d_]")
+
+
+class Recorder(Cog, description="Records incoming gateway events to a trace"):
+    def __init__(self, bot, path: Path):
+        self.bot = bot
+        self.started = time.monotonic()
+        self.scrubber = TraceScrubber(bot)
+        self.trace = gzip.open(path, "wt")
+        self.write(None, {"version": TRACE_VERSION, "config": self.scrubber.config(config)})
+
+    def cog_unload(self):
+        self.trace.close()
+
+    def write(self, event: Optional[str], data: Any):
+        offset = round((time.monotonic() - self.started) * 1000)
+        self.trace.write(json.dumps([offset, event, data], separators=(",", ":")) + "\n")
+
+    @Cog.listener()
+    async def on_socket_response(self, msg):
+        if msg.get("op") == 0:
+            self.write(msg["t"], self.scrubber.payload(msg["d"]))
+
+    @Cog.listener()
+    async def on_ready(self):
+        self.write(None, {"owner_id": self.scrubber.snowflake((await self.bot.application_info()).owner.id)})
+
+
+class TraceScrubber:
+    def __init__(self, bot):
+        self.bot = bot
+        self.salt = os.urandom(16)
+        self.kept_names = {spec["name"] for specs in GUILD_TEMPLATE.values() for spec in specs}
+        self.kept_names.update(name for name, _ in ALTERS)
+
+    def digest(self, value: str) -> int:
+        return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=4, key=self.salt).digest(), "little")
+
+    def snowflake(self, value: Union[int, str]) -> Union[int, str]:
+        if isinstance(value, bool) or not str(value).isdigit() or int(value) < 1 << 32:
+            return value
+        mapped = int(value) >> 22 << 22 | self.digest(str(value)) & 0x3FFFFF
+        return str(mapped) if isinstance(value, str) else mapped
+
+    def name(self, value: str) -> str:
+        if value in self.kept_names or not re.search(r"[^\W\d_]", value):
+            return value
+        return f"name{self.digest(value):08x}"
+
+    def token(self, match) -> str:
+        if match[2]:
+            return f"<{match[1]}{self.snowflake(match[2])}>"
+        if match[5]:
+            return f"<{match[3]}:{self.name(match[4])}:{self.snowflake(match[5])}>"
+        return "x"
+
+    def text(self, value: str) -> str:
+        return TRACE_TOKENS.sub(self.token, value)
+
+    def content(self, value: str) -> str:
+        prefix = self.bot.command_prefix
+        if not value.startswith(prefix):
+            return self.text(value)
+        words = value.split(" ")
+        command, kept = self.bot.get_command(words[0][len(prefix) :]), 1
+        while kept < len(words) and words[kept] in getattr(command, "all_commands", {}):
+            command, kept = command.all_commands[words[kept]], kept + 1
+        return " ".join(words[:kept] + ([self.text(" ".join(words[kept:]))] if words[kept:] else []))
+
+    def payload(self, data: Any, key: Optional[str] = None) -> Any:
+        if isinstance(data, list):
+            return [self.payload(item, key) for item in data]
+        if isinstance(data, dict):
+            return {field: self.payload(value, field) for field, value in data.items()}
+        if key in TRACE_SCRUBBED:
+            return None
+        if not isinstance(data, str) or key is None:
+            return data
+        if key == "id" or key.endswith("_id") or key in ("roles", "mention_roles"):
+            return self.snowflake(data)
+        if key == "content":
+            return self.content(data)
+        if key in TRACE_TEXT:
+            return self.text(data)
+        if key in ("username", "global_name"):
+            return f"user{self.digest(data):08x}"
+        if key == "nick":
+            return f"Member {self.digest(data):08x}"
+        if key == "name":
+            return self.name(data)
+        return data
+
+    def config(self, data: dict) -> dict:
+        scrubbed = {key: self.config_value(data.get(key, {})) for key in TRACE_CONFIG}
+        scrubbed["guilds"] = {
+            guild_id: {key: value for key, value in guild_config.items() if key not in TRACE_GUILD_DROPPED}
+            for guild_id, guild_config in scrubbed["guilds"].items()
+        }
+        scrubbed["colleges"] = {self.name(name): colour for name, colour in scrubbed["colleges"].items()}
+        return scrubbed
+
+    def config_value(self, value: Any) -> Any:
+        if isinstance(value, dict):
+            return {
+                self.text(key) if key.startswith("<") else self.snowflake(key): self.config_value(item)
+                for key, item in value.items()
+            }
+        if isinstance(value, list):
+            return [self.config_value(item) for item in value]
+        return self.snowflake(value)
+
+
+class FakeHTTP(discord.http.HTTPClient):
+    def __init__(self, loop, latency: float = 0.0):
+        super().__init__(loop=loop)
+        self.latency = latency
+        self.calls = {}
+        self.ids = itertools.count()
+        self.bot = None
+
+    def snowflake(self) -> str:
+        return str(discord.utils.time_snowflake(datetime.utcnow()) + next(self.ids) % 4096)
+
+    def message(self, channel_id: int, message_id: str, payload: dict) -> dict:
+        return {
+            "id": message_id,
+            "channel_id": str(channel_id),
+            "author": self.bot.user._to_minimal_user_json(),
+            "content": payload.get("content") or "",
+            "embeds": [payload["embed"]] if payload.get("embed") else [],
+            "attachments": [],
+            "mentions": [],
+            "mention_roles": [],
+            "mention_everyone": False,
+            "pinned": False,
+            "tts": False,
+            "type": 0,
+            "timestamp": datetime.utcnow().isoformat(),
+            "edited_timestamp": None,
+        }
+
+    async def request(self, route, *, files=None, form=None, **kwargs):
+        key = f"{route.method} {route.path}"
+        self.calls[key] = self.calls.get(key, 0) + 1
+        await asyncio.sleep(self.latency)
+        payload = kwargs.get("json") or {}
+        last = route.url.rsplit("/", 1)[-1]
+        if route.path.startswith("/channels/{channel_id}/messages") and route.method in ("POST", "PATCH"):
+            return self.message(route.channel_id, last if route.method == "PATCH" else self.snowflake(), payload)
+        if route.path == "/users/@me/channels":
+            return {"id": self.snowflake(), "type": 1, "recipients": [self.user_payload(payload["recipient_id"])]}
+        if route.path == "/users/{user_id}":
+            return self.user_payload(last)
+        if route.path == "/guilds/{guild_id}/roles" and route.method == "POST":
+            return {
+                "id": self.snowflake(),
+                "name": payload.get("name", "new role"),
+                "permissions": str(payload.get("permissions", 0)),
+                "color": payload.get("color", 0),
+                "hoist": payload.get("hoist", False),
+                "mentionable": payload.get("mentionable", False),
+                "position": 1,
+                "managed": False,
+            }
+        if route.method == "GET" and route.path.endswith("s"):
+            return []
+        return {}
+
+    def user_payload(self, user_id) -> dict:
+        user = self.bot.get_user(int(user_id))
+        if user is not None:
+            return user._to_minimal_user_json()
+        return {"id": str(user_id), "username": f"user{str(user_id)[-4:]}", "discriminator": "0000", "avatar": None}
+
+    async def get_from_cdn(self, url):
+        self.calls["GET cdn"] = self.calls.get("GET cdn", 0) + 1
+        await asyncio.sleep(self.latency)
+        return b""
+
+
+def percentiles(samples: List[float]) -> str:
+    if not samples:
+        return "n=0"
+    samples = sorted(samples)
+    pick = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))] * 1000
+    return f"n={len(samples)} p50={pick(0.5):.1f}ms p95={pick(0.95):.1f}ms max={samples[-1] * 1000:.1f}ms"
+
+
+async def probe_loop_lag(lags: List[float], interval: float = 0.05):
+    while True:
+        started = time.monotonic()
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, time.monotonic() - started - interval))
+
+
+async def replay_trace(path: Path, speed: float = 1.0, rest_latency: float = 0.0):
+    with gzip.open(path, "rt") as trace:
+        header = json.loads(trace.readline())[2]
+        events = [json.loads(line) for line in trace]
+    if header.get("version") != TRACE_VERSION:
+        raise ValueError(f"Unsupported trace version {header.get('version')}")
+    config.clear()
+    config.update(header["config"])
+    for guild_config in config["guilds"].values():
+        guild_config.pop("alter", None)
+        guild_config.pop("personas", None)
+    scratch = tempfile.TemporaryDirectory()
+    coop.CONFIG_PATH = Path(scratch.name) / "config.json"
+    coop.ATTENDANCE_PATH, coop.INDEX_PATH = Path(scratch.name) / "attendance", Path(scratch.name) / "index"
+    directory.path, directory.entries, directory.stale = Path(scratch.name) / "directory.json", {}, True
+    registrations.path, registrations.sessions = Path(scratch.name) / "registrations.json", {}
+    bot = build_bot()
+    http = FakeHTTP(bot.loop, rest_latency)
+    http.bot = bot
+    bot.http = bot._connection.http = http
+    bot._connection.is_bot = True
+    bot._connection._chunk_guilds = False
+    bot.owner_ids = {0}
+    fed, latencies, lags = {}, {}, []
+
+    async def on_command_done(ctx, *_):
+        if ctx.message.id in fed:
+            latencies.setdefault(ctx.command.qualified_name if ctx.command else "unknown", []).append(
+                time.monotonic() - fed[ctx.message.id]
+            )
+
+    bot.add_listener(on_command_done, "on_command_completion")
+    bot.add_listener(on_command_done, "on_command_error")
+    probe = asyncio.ensure_future(probe_loop_lag(lags))
+    started = time.monotonic()
+    for offset, event, data in events:
+        if event is None:
+            bot.owner_id = data.get("owner_id", bot.owner_id)
+            continue
+        delay = offset / 1000 / speed - (time.monotonic() - started)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if event == "MESSAGE_CREATE":
+            fed[int(data["id"])] = time.monotonic()
+        parser = bot._connection.parsers.get(event)
+        if parser is not None:
+            try:
+                parser(data)
+            except Exception as e:
+                print(f"{event}: {type(e).__name__}: {e}")
+    await asyncio.sleep(bot._connection.guild_ready_timeout + 1)
+    elapsed = time.monotonic() - started
+    probe.cancel()
+    for cog in list(bot.cogs):
+        bot.remove_cog(cog)
+    scratch.cleanup()
+    print(f"Replayed {len(events)} events in {elapsed:.1f} s at {speed}x")
+    print("Command latency:")
+    for name, samples in sorted(latencies.items()):
+        print(f"  {name}: {percentiles(samples)}")
+    print(f"REST calls: {sum(http.calls.values())}")
+    for route, count in sorted(http.calls.items(), key=lambda item: -item[1]):
+        print(f"  {route}: {count}")
+    print(f"Event loop lag: {percentiles(lags)}")
+
+
+def replay():
+    parser = argparse.ArgumentParser(description="Replay a recorded gateway trace against the bot cogs")
+    parser.add_argument("trace", type=Path, help="trace written by running the bot with TRACE_PATH set")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed multiplier between 1 and 100")
+    parser.add_argument("--rest-latency", type=float, default=0.0, help="simulated seconds per REST call")
+    args = parser.parse_args()
+    if not 1 <= args.speed <= 100:
+        parser.error("--speed must be between 1 and 100")
+    asyncio.run(replay_trace(args.trace, args.speed, args.rest_latency))
@@ -0,0 +1,9 @@
+import json
+import os
+import tempfile
+from pathlib import Path
+
+config_path = Path(tempfile.mkdtemp()) / "config.json"
+with open(config_path, "w") as config_file:
+    json.dump({"guilds": {}, "colleges": {}, "members": {}, "mods": []}, config_file)
+os.environ["CONFIG_PATH"] = str(config_path)
@@ -2,4 +2,4 @@ from adtn_coop_bot import __version__
 
 
 def test_version():
-    assert __version__ == '0.1.0'
+    assert __version__ == '1.0.0'
@@ -0,0 +1,48 @@
+from adtn_coop_bot import adtn_coop_bot
+from adtn_coop_bot.adtn_coop_bot import AttendanceLog
+
+
+def record(log):
+    log.join(1, 100.0)
+    log.join(2, 150.0)
+    log.leave(1, 200.0)
+    log.leave(2, 300.0)
+    log.join(1, 400.0)
+    log.leave(1, 450.0)
+
+
+def test_stats_sum_time_and_overlap(tmp_path, monkeypatch):
+    monkeypatch.setattr(adtn_coop_bot, "ATTENDANCE_PATH", tmp_path)
+    log = AttendanceLog(1)
+    record(log)
+    stats = log.stats(0.0, 1000.0)
+    assert stats[1]["seconds"] == 150.0
+    assert stats[2]["seconds"] == 150.0
+    assert stats[1]["overlap"] == 50.0
+    assert stats[2]["overlap"] == 50.0
+
+
+def test_stats_clip_to_the_window(tmp_path, monkeypatch):
+    monkeypatch.setattr(adtn_coop_bot, "ATTENDANCE_PATH", tmp_path)
+    log = AttendanceLog(1)
+    record(log)
+    stats = log.stats(160.0, 250.0)
+    assert stats[1]["seconds"] == 40.0
+    assert stats[2]["seconds"] == 90.0
+    assert stats[1]["overlap"] == stats[2]["overlap"] == 40.0
+
+
+def test_sessions_survive_a_reload(tmp_path, monkeypatch):
+    monkeypatch.setattr(adtn_coop_bot, "ATTENDANCE_PATH", tmp_path)
+    record(AttendanceLog(1))
+    log = AttendanceLog(1)
+    assert list(log.members) == [1, 2, 1]
+    assert log.stats(0.0, 1000.0)[1]["seconds"] == 150.0
+
+
+def test_leave_without_join_is_ignored(tmp_path, monkeypatch):
+    monkeypatch.setattr(adtn_coop_bot, "ATTENDANCE_PATH", tmp_path)
+    log = AttendanceLog(1)
+    log.leave(1, 100.0)
+    assert len(log.members) == 0
+    assert not (tmp_path / "1.bin").exists()
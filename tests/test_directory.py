@@ -0,0 +1,52 @@
+from types import SimpleNamespace
+
+import pytest
+
+from adtn_coop_bot import adtn_coop_bot
+from adtn_coop_bot.adtn_coop_bot import MemberDirectory, RoleRegistry
+
+GUILD = SimpleNamespace(id=1)
+TERM, HISS, GAMERS, AUBURN = (
+    SimpleNamespace(id=10, name="1st Termer"),
+    SimpleNamespace(id=11, name="HISS"),
+    SimpleNamespace(id=12, name="Gamers"),
+    SimpleNamespace(id=13, name="Auburn"),
+)
+
+
+@pytest.fixture
+def directory(tmp_path, monkeypatch):
+    registry = RoleRegistry()
+    registry.record(GUILD, "teams", HISS)
+    registry.record(GUILD, "schools", AUBURN)
+    monkeypatch.setattr(adtn_coop_bot, "role_registry", registry)
+    monkeypatch.setitem(adtn_coop_bot.config["guilds"], "1", {})
+    return MemberDirectory(tmp_path / "directory.json")
+
+
+def member(member_id, nick, name, *roles):
+    return SimpleNamespace(id=member_id, nick=nick, name=name, bot=False, guild=GUILD, roles=list(roles))
+
+
+def test_update_classifies_roles_through_the_registry(directory):
+    directory.update(member(1, "Jane Doe", "jdoe", TERM, HISS, GAMERS, AUBURN))
+    assert directory.entries[1] == [[1], "Jane Doe", "1st Termer", "Auburn", "HISS", "jdoe"]
+
+
+def test_search_ranks_prefix_matches_first(directory):
+    directory.update(member(1, "Dana Scully", "scully", HISS))
+    directory.update(member(2, "Dan Brown", "dbrown"))
+    directory.update(member(3, "Jordan Dana", "jd"))
+    assert directory.search("dan") == [1, 2, 3]
+    assert directory.search("hiss") == [1]
+    assert directory.search("nobody") == []
+
+
+def test_search_sees_updates_and_reloads(directory, tmp_path):
+    directory.update(member(1, "Jane Doe", "jdoe"))
+    assert directory.search("jane") == [1]
+    directory.update(member(1, "Jane Smith", "jdoe"))
+    assert directory.search("jane doe") == []
+    assert directory.dirty
+    directory.save()
+    assert MemberDirectory(tmp_path / "directory.json").search("smith") == [1]
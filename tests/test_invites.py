@@ -0,0 +1,68 @@
+import asyncio
+from types import SimpleNamespace
+
+from adtn_coop_bot import adtn_coop_bot
+from adtn_coop_bot.adtn_coop_bot import InvitePool
+
+
+class FakeGuild:
+    def __init__(self, **uses):
+        self.id = 1
+        self.uses = uses
+        self.max_uses = {}
+
+    async def invites(self):
+        return [
+            SimpleNamespace(code=code, uses=uses, max_uses=self.max_uses.get(code, 0))
+            for code, uses in self.uses.items()
+        ]
+
+
+def member(guild, member_id):
+    return SimpleNamespace(id=member_id, guild=guild)
+
+
+def attribute(pool, guild, *joined):
+    async def run():
+        results = await asyncio.gather(*[pool.attribute(member(guild, member_id)) for member_id in joined])
+        return [[(joined.id, code) for joined, code in result] for result in results if result is not None]
+
+    return asyncio.run(run())
+
+
+def test_unknown_before_the_first_refresh(monkeypatch):
+    monkeypatch.setattr(adtn_coop_bot, "INVITE_BATCH_DELAY", 0)
+    assert attribute(InvitePool(), FakeGuild(a=1), 10) == [[(10, None)]]
+
+
+def test_single_join_uses_the_changed_invite(monkeypatch):
+    monkeypatch.setattr(adtn_coop_bot, "INVITE_BATCH_DELAY", 0)
+    pool, guild = InvitePool(), FakeGuild(a=1, b=4)
+    asyncio.run(pool.refresh(guild))
+    guild.uses["b"] = 5
+    assert attribute(pool, guild, 10) == [[(10, "b")]]
+
+
+def test_batched_joins_share_one_diff(monkeypatch):
+    monkeypatch.setattr(adtn_coop_bot, "INVITE_BATCH_DELAY", 0)
+    pool, guild = InvitePool(), FakeGuild(a=1, b=4)
+    asyncio.run(pool.refresh(guild))
+    guild.uses["a"] = 3
+    assert attribute(pool, guild, 10, 11) == [[(10, "a"), (11, "a")]]
+
+
+def test_mixed_invites_are_ambiguous(monkeypatch):
+    monkeypatch.setattr(adtn_coop_bot, "INVITE_BATCH_DELAY", 0)
+    pool, guild = InvitePool(), FakeGuild(a=1, b=4)
+    asyncio.run(pool.refresh(guild))
+    guild.uses.update(a=2, b=5)
+    assert attribute(pool, guild, 10, 11) == [[(10, "a|b"), (11, "a|b")]]
+
+
+def test_exhausted_invite_that_vanished_is_counted(monkeypatch):
+    monkeypatch.setattr(adtn_coop_bot, "INVITE_BATCH_DELAY", 0)
+    pool, guild = InvitePool(), FakeGuild(a=1, once=0)
+    guild.max_uses["once"] = 1
+    asyncio.run(pool.refresh(guild))
+    del guild.uses["once"]
+    assert attribute(pool, guild, 10) == [[(10, "once")]]
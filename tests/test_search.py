@@ -0,0 +1,72 @@
+from discord import Embed
+
+from adtn_coop_bot import adtn_coop_bot
+from adtn_coop_bot.adtn_coop_bot import SearchIndex, message_text, tokenize
+
+
+def build(tmp_path, monkeypatch) -> SearchIndex:
+    monkeypatch.setattr(adtn_coop_bot, "INDEX_PATH", tmp_path)
+    index = SearchIndex(1)
+    index.add(100, 10, 20, "Team meeting on Friday")
+    index.add(101, 10, 21, "meeting notes meeting agenda")
+    index.add(102, 11, 20, "lunch on friday")
+    return index
+
+
+def found(results):
+    return [doc_id for _, doc_id in results]
+
+
+def test_search_ranks_by_term_frequency(tmp_path, monkeypatch):
+    index = build(tmp_path, monkeypatch)
+    assert found(index.search("meeting")) == [101, 100]
+    assert found(index.search("friday", channel_id=11)) == [102]
+    assert found(index.search("friday", author_id=20)) == [102, 100]
+    assert found(index.search("friday", channels={10})) == [100]
+
+
+def test_save_and_load_round_trip(tmp_path, monkeypatch):
+    index = build(tmp_path, monkeypatch)
+    index.remove(102)
+    index.save()
+    loaded = SearchIndex(1)
+    assert loaded.docs == {100: (10, 20), 101: (10, 21)}
+    assert "lunch" not in loaded.postings
+    assert found(loaded.search("meeting")) == found(index.search("meeting"))
+    assert list(loaded.postings["meeting"][1]) == [1, 2]
+
+
+def test_cached_edit_replaces_terms(tmp_path, monkeypatch):
+    index = build(tmp_path, monkeypatch)
+    index.remove(100, "Team meeting on Friday")
+    index.add(100, 10, 20, "Team meeting on Monday")
+    assert found(index.search("friday")) == [102]
+    assert list(index.postings["meeting"][0]).count(100) == 1
+
+
+def test_uncached_edit_hides_old_postings_until_saved(tmp_path, monkeypatch):
+    index = build(tmp_path, monkeypatch)
+    index.invalidate(100)
+    index.add(100, 10, 20, "Team meeting on Monday")
+    assert found(index.search("friday")) == [102]
+    assert found(index.search("monday")) == [100]
+    assert found(index.search("meeting")) == [101, 100]
+    index.save()
+    assert index.stale == {}
+    assert list(index.postings["meeting"][0]) == [100, 101]
+    assert list(index.postings["friday"][0]) == [102]
+    assert found(SearchIndex(1).search("monday")) == [100]
+
+
+def test_invalidated_message_can_be_deleted(tmp_path, monkeypatch):
+    index = build(tmp_path, monkeypatch)
+    index.invalidate(102)
+    index.add(102, 11, 20, "dinner on friday")
+    index.remove(102)
+    assert index.search("lunch") == []
+    assert index.search("dinner") == []
+
+
+def test_embed_text_is_indexed():
+    embed = Embed(title="Teatime", description="Join the voice channel")
+    assert tokenize(message_text("", [embed])) == {"teatime": 1, "join": 1, "voice": 1, "channel": 1}
@@ -0,0 +1,74 @@
+import asyncio
+from types import SimpleNamespace
+
+from adtn_coop_bot.adtn_coop_bot import single_flight, single_flight_invalidator
+
+
+def test_concurrent_calls_share_one_run():
+    calls = []
+
+    @single_flight()
+    async def scan(guild):
+        calls.append(guild.id)
+        await asyncio.sleep(0.01)
+        return len(calls)
+
+    async def run():
+        guild = SimpleNamespace(id=1)
+        return await asyncio.gather(scan(guild), scan(guild), scan(guild))
+
+    assert asyncio.run(run()) == [1, 1, 1]
+    assert calls == [1]
+
+
+def test_results_are_cached_until_invalidated():
+    calls = []
+
+    @single_flight(ttl=60)
+    async def scan(guild):
+        calls.append(guild.id)
+        return len(calls)
+
+    async def run():
+        guild, other = SimpleNamespace(id=1), SimpleNamespace(id=2)
+        first, second, other_first = await scan(guild), await scan(guild), await scan(other)
+        scan.invalidate(guild.id)
+        assert not scan.cached(guild)
+        assert scan.cached(other)
+        return first, second, other_first, await scan(guild)
+
+    assert asyncio.run(run()) == (1, 1, 2, 3)
+
+
+def test_invalidation_during_a_run_skips_caching_it():
+    @single_flight(ttl=60)
+    async def scan(guild):
+        await asyncio.sleep(0.01)
+        return "stale"
+
+    async def run():
+        guild = SimpleNamespace(id=1)
+        task = asyncio.ensure_future(scan(guild))
+        await asyncio.sleep(0)
+        scan.invalidate(guild.id)
+        await task
+        return scan.cached(guild)
+
+    assert asyncio.run(run()) is False
+
+
+def test_invalidator_listener_reads_the_payload_guild():
+    calls = []
+
+    @single_flight(ttl=60, invalidate_on=("test_single_flight_event",))
+    async def scan(guild):
+        calls.append(guild.id)
+        return len(calls)
+
+    async def run():
+        guild = SimpleNamespace(id=1)
+        await scan(guild)
+        await single_flight_invalidator("test_single_flight_event")(SimpleNamespace(guild_id=1))
+        return await scan(guild)
+
+    assert asyncio.run(run()) == 2